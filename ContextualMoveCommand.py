@@ -4,6 +4,7 @@ class SetMoveContextCommand(sublime_plugin.WindowCommand):
 	def run(self, value, demarcator='', command=None, args={}):
 		settings = self.window.settings();
 		settings.set('move_context', value)
+		settings.set('move_context_demarcator', demarcator)
 		if command:	self.window.run_command(command, args)
 
 class DoOnceMoveContextCommand(sublime_plugin.WindowCommand):
@@ -35,7 +36,9 @@ class ContextualMoveCommand(sublime_plugin.WindowCommand):
 		
 		if context in commands:
 			command = commands[context]
-			args = command['args'] if 'args' in command else {} 
+			args = dict(command['args']) if 'args' in command else {} 
+			if args.get('by') == 'custom' and not args.get('demarcator'):
+				args['demarcator'] = settings.get('move_context_demarcator', '')
 			self.window.run_command(command['command'], args)
 
 		if to_end:
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+
+"""
+A differential fuzz harness for demarcations.
+
+Any faster way to find region boundaries (an index, a cache, a tokenizer) risks the off-by-one errors
+that the design in "CATEGORY.png" is meant to prevent. For each engine registered in ENGINES,
+the harness generates random buffers within a hidden output panel, then checks that a reference demarcation
+and a candidate demarcation agree on every position and every movement of a random set of cursors.
+It also checks the idempotence laws of the candidate (e.g. "nextend(nextend(p)) == nextend(p)"),
+and times both, so that every speed-up comes with a proof of equivalence and a measured gain.
+Violations that the reference shares are counted apart, since they are not regressions of the candidate.
+Scope trees are also checked for containment, against the innermost scope found by scanning every scope,
+and the "cached" engines round trip their indexes through the memory mapped disk cache of "engines/indexcache.py".
+Before fuzzing, the boundaries of words and subwords found by the tokenizer and by the editor
+are both checked against a corpus of expected boundaries (see "TOKENIZER_CORPUS").
+The harness also runs without Sublime Text, against the stand-in views of "standin/sublime.py" (see "standin/fuzz.py").
+"""
+
+import os
+import time
+import random
+import tempfile
+from itertools import count
+from functools import partial
+import sublime, sublime_plugin
+
+try:
+    from .MoveByScopeCommand import engines, RegionMovement, RegionExpansion, RegionTraversal, movement, expansion
+except ValueError: # HACK: for ST2 compatability
+    from MoveByScopeCommand import engines, RegionMovement, RegionExpansion, RegionTraversal, movement, expansion
+
+SYNTAXES = {
+    'text': 'Packages/Text/Plain text.tmLanguage',
+    'python': 'Packages/Python/Python.sublime-syntax',
+    'c': 'Packages/C++/C.sublime-syntax',
+}
+
+# SECTION: REFERENCE IMPLEMENTATIONS
+class ReferenceCustomDemarcation:
+    """the original implementation of CustomDemarcation, which searches the whole view on every call"""
+    def __init__(self, view, demarcator):
+        self.view = view
+        self.demarcator = demarcator
+    def prevbegin(self, position):
+        return max([delimiter.end()
+            for delimiter in self.view.find_all(self.demarcator)
+            if delimiter.end() <= position
+        ] or [position])
+    def nextend(self, position):
+        return min([delimiter.begin()
+            for delimiter in self.view.find_all(self.demarcator)
+            if position <= delimiter.begin()
+        ] or [position])
+
+class ReferenceRegionListDemarcation:
+    """the plain implementation of RegionListDemarcation, which scans every region of a key on every call"""
+    def __init__(self, view, key):
+        self.view = view
+        self.key = key
+    def prevbegin(self, position):
+        return max([region.begin()
+            for region in self.view.get_regions(self.key)
+            if region.begin() <= position
+        ] or [position])
+    def nextend(self, position):
+        return min([region.end()
+            for region in self.view.get_regions(self.key)
+            if position <= region.end()
+        ] or [position])
+
+def whole_view(view):
+    return sublime.Region(0, view.size())
+
+def unlimited(engine):
+    return engine.Deadline(float('inf'))
+
+scratch_files = count()
+
+def cached_demarcation(engine, view, type):
+    """Returns the indexed demarcation of a type after a round trip of its index through the disk cache,
+    so that it moves over memory mapped offset arrays, as it does once a file is reopened.
+    Cache entries are keyed by a file on disk, so the text of the view is written to a scratch file first."""
+    language = engine.source(view)
+    key = engine.index_key(type, language)
+    index = engine.demarcation(view, type, indexed=False).index()
+    path = os.path.join(tempfile.gettempdir(), 'contextual_move_fuzz_%d.txt' % next(scratch_files))
+    with open(path, 'wb') as file:
+        file.write(view.substr(whole_view(view)).encode('utf-8'))
+    signature = engine.indexcache.file_signature(path, view.settings().get('syntax'))
+    engine.indexcache.write(signature, {key: index}, engine.indexcache.DEFAULT_CAPACITY * 1024 * 1024)
+    loaded = engine.indexcache.read(signature).get(key, dict.fromkeys(index, [])) # NOTE: a failed round trip finds nothing
+    for filename in [path, engine.indexcache.cache_file(path)]:
+        try:
+            os.remove(filename)
+        except (IOError, OSError): # NOTE: on some platforms, files cannot be removed while they are mapped
+            pass
+    return engine.index_demarcation(view, language, loaded)
+
+def tree_demarcation(engine, view, type, demarcation_):
+    return engine.ScopeTreeDemarcation(engine.ScopeTree(engine.scope_intervals(view, engine.source(view), demarcation_)))
+
+# SECTION: ENGINES UNDER TEST
+ENGINES = {
+    # name: (syntax, reference factory, candidate factory), where factories are given the module of demarcation engines
+    'subwords': ('text',
+        lambda engine, view: engine.SubWordDemarcation(view),
+        lambda engine, view: engine.TokenizedDemarcation(view, engine.SUB_WORD_CLASSES)),
+    'words': ('text',
+        lambda engine, view: engine.WordDemarcation(view),
+        lambda engine, view: engine.TokenizedDemarcation(view, engine.WORD_CLASSES)),
+    'custom braces': ('text',
+        lambda engine, view: ReferenceCustomDemarcation(view, r'[{}]'),
+        lambda engine, view: engine.demarcation(view, 'braces')),
+    'custom tabulations': ('text',
+        lambda engine, view: ReferenceCustomDemarcation(view, r'\t'),
+        lambda engine, view: engine.demarcation(view, 'tabulations')),
+    'custom headings': ('text',
+        lambda engine, view: ReferenceCustomDemarcation(view, r'^#+ '),
+        lambda engine, view: engine.demarcation(view, 'custom', r'^#+ ')),
+    'listitems': ('text',
+        lambda engine, view: engine.ListItemDemarcation(view),
+        lambda engine, view: engine.windowed_demarcation(view, 'listitems', None, '', whole_view(view), unlimited(engine))),
+    'python functions': ('python',
+        lambda engine, view: engine.demarcation(view, 'functions', indexed=False),
+        lambda engine, view: engine.demarcation(view, 'functions')),
+    'python classes': ('python',
+        lambda engine, view: engine.demarcation(view, 'classes', indexed=False),
+        lambda engine, view: engine.demarcation(view, 'classes')),
+    'c functions': ('c',
+        lambda engine, view: engine.demarcation(view, 'functions', indexed=False),
+        lambda engine, view: engine.demarcation(view, 'functions')),
+    'c classes': ('c',
+        lambda engine, view: engine.demarcation(view, 'classes', indexed=False),
+        lambda engine, view: engine.demarcation(view, 'classes')),
+    'python cached functions': ('python',
+        lambda engine, view: engine.demarcation(view, 'functions', indexed=False),
+        lambda engine, view: cached_demarcation(engine, view, 'functions')),
+    'c cached functions': ('c',
+        lambda engine, view: engine.demarcation(view, 'functions', indexed=False),
+        lambda engine, view: cached_demarcation(engine, view, 'functions')),
+    'c cached classes': ('c',
+        lambda engine, view: engine.demarcation(view, 'classes', indexed=False),
+        lambda engine, view: cached_demarcation(engine, view, 'classes')),
+    'python function tree': ('python',
+        lambda engine, view: tree_demarcation(engine, view, 'functions', engine.demarcation(view, 'functions', indexed=False)),
+        lambda engine, view: engine.ScopeTreeDemarcation(
+            engine.scope_tree(view, 'functions', cached_demarcation(engine, view, 'functions')))),
+    'c function tree': ('c',
+        lambda engine, view: tree_demarcation(engine, view, 'functions', engine.demarcation(view, 'functions', indexed=False)),
+        lambda engine, view: engine.ScopeTreeDemarcation(
+            engine.scope_tree(view, 'functions', cached_demarcation(engine, view, 'functions')))),
+    'bookmarks': ('text',
+        lambda engine, view: ReferenceRegionListDemarcation(view, 'bookmarks'),
+        lambda engine, view: engine.demarcation(view, 'bookmarks')),
+}
+
+# SECTION: RANDOM BUFFERS
+TOKENS = ['foo', 'barBaz', 'HTTPServer', 'snake_case', '_x', '42', 'x1', 'über',
+    '->', ',', ', ', '.', '(', ')', '{', '}', '[', ']', ' ', '  ', '\t', '\n', '\n\n', '# ', '## ', '---\n']
+
+def random_text(rng):
+    return ''.join(rng.choice(TOKENS) for i in range(rng.randint(0, 80)))
+
+def random_python(rng, depth=0):
+    indent = '    ' * depth
+    lines = []
+    for i in range(rng.randint(0 if depth else 1, 4)):
+        kind = rng.choice(['def', 'class', 'statement', 'statement', 'blank', 'decorator', 'comment'])
+        if kind == 'def' and depth < 3:
+            lines.append('%sdef f%d(a, b=(1, 2)):' % (indent, rng.randint(0, 99)))
+            lines.append(random_python(rng, depth+1) or indent + '    pass')
+        elif kind == 'class' and depth < 3:
+            lines.append('%sclass C%d(object):' % (indent, rng.randint(0, 99)))
+            lines.append(random_python(rng, depth+1) or indent + '    pass')
+        elif kind == 'decorator':
+            lines.append('%s@decorator' % indent)
+        elif kind == 'comment':
+            lines.append('%s# %s' % (indent, random_text(rng).replace('\n', ' ')))
+        elif kind == 'blank':
+            lines.append('')
+        else:
+            lines.append('%sx = [1, 2, lambda y: y]' % indent)
+    return '\n'.join(lines)
+
+def random_c(rng, depth=0):
+    indent = '  ' * depth
+    lines = []
+    for i in range(rng.randint(0 if depth else 1, 4)):
+        kind = rng.choice(['function', 'struct', 'block', 'statement', 'comment', 'blank'])
+        if kind == 'function' and depth == 0:
+            lines.append('static int f%d(int a, char* b) {' % rng.randint(0, 99))
+            lines.append(random_c(rng, depth+1))
+            lines.append('}')
+        elif kind == 'struct' and depth == 0:
+            lines.append('struct S%d {\n  int a;\n};' % rng.randint(0, 99))
+        elif kind == 'block' and 0 < depth < 3:
+            lines.append('%sif (a) {' % indent)
+            lines.append(random_c(rng, depth+1))
+            lines.append('%s}' % indent)
+        elif kind == 'comment':
+            lines.append('%s// %s' % (indent, random_text(rng).replace('\n', ' ')))
+        elif kind == 'blank':
+            lines.append('')
+        else:
+            lines.append('%sa = b[0] + 1;' % indent)
+    return '\n'.join(lines)
+
+GENERATORS = {
+    'text': random_text,
+    'python': random_python,
+    'c': random_c,
+}
+
+# SECTION: EXPECTED BOUNDARIES
+TOKENIZER_CORPUS = [
+    # line, columns of subword boundaries, columns of word boundaries (given the default word separators)
+    ('', [0], []),
+    ('snake_case', [0, 5, 6, 10], [0, 10]),
+    ('__init__', [0, 2, 6, 8], [0, 8]),
+    ('a1_2b', [0, 2, 3, 5], [0, 5]),
+    ('camelCase42', [0, 5, 11], [0, 11]),
+    ('x1y2Z', [0, 4, 5], [0, 5]),
+    ('HTTPServer', [0, 4, 10], [0, 10]),
+    ('getHTTPResponseCode', [0, 3, 7, 15, 19], [0, 19]),
+    ('über_Straße', [0, 4, 5, 11], [0, 11]),
+    ('foo.bar(baz)', [0, 3, 4, 7, 8, 11, 12], [0, 3, 4, 7, 8, 11, 12]),
+    ('x = 42;', [0, 1, 2, 3, 4, 6, 7], [0, 1, 2, 3, 4, 6, 7]),
+    ('  a -> b', [0, 2, 3, 4, 6, 7, 8], [2, 3, 4, 6, 7, 8]),
+]
+
+def corpus_failures(name, snapshot, classes, column_index):
+    """Returns descriptions of every point of the corpus where the find_by_class() of a snapshot
+    disagrees with the expected boundaries, where snapshot maps a line to anything providing find_by_class()"""
+    failures = []
+    for entry in TOKENIZER_CORPUS:
+        line, columns = entry[0], entry[column_index]
+        finder = snapshot(line)
+        for position in range(len(line) + 1):
+            expected = [min([column for column in columns if column > position] or [len(line)]),
+                        max([column for column in columns if column < position] or [0])]
+            actual = [finder.find_by_class(position, True, classes), finder.find_by_class(position, False, classes)]
+            if expected != actual:
+                failures.append('%s: nextend/prevbegin(%d) are %r, expected %r in %r' % (name, position, actual, expected, line))
+    return failures
+
+def corpus_report(snapshots):
+    """Checks the corpus against each of a dict mapping names to snapshots, returning the lines of a report and the number of failures"""
+    engine = engines()
+    lines = []
+    total = 0
+    for name in sorted(snapshots):
+        failures = (corpus_failures(name + ' subwords', snapshots[name], engine.SUB_WORD_CLASSES, 1)
+            + corpus_failures(name + ' words', snapshots[name], engine.WORD_CLASSES, 2))
+        total += len(failures)
+        lines.append('%s corpus: %d failures' % (name, len(failures)))
+        lines.extend('    ' + failure for failure in failures[:10])
+    return lines, total
+
+def tokenizer_snapshot(line):
+    engine = engines()
+    return engine.LineSnapshot(line, engine.DEFAULT_WORD_SEPARATORS)
+
+# SECTION: CHECKS
+def violations(reference, candidate, positions):
+    """Yields (shared, description) for every position where two demarcations disagree,
+    or where the candidate violates its idempotence laws, where shared is True if the reference violates the same law"""
+    for position in positions:
+        for name in ['prevbegin', 'nextend']:
+            expected = getattr(reference, name)(position)
+            actual = getattr(candidate, name)(position)
+            if expected != actual:
+                yield False, '%s(%d) is %d, expected %d' % (name, position, actual, expected)
+            if getattr(candidate, name)(actual) != actual:
+                yield (expected == actual and getattr(reference, name)(expected) != expected, 
+                    '%s(%s(%d)) is not %s(%d)' % (name, name, position, name, position))
+
+def containment_violations(tree, positions):
+    """Yields descriptions of every scope of a tree that is not within its parent,
+    and of every position where the innermost scope that the tree finds is not the innermost scope containing it"""
+    for scope in tree.scopes:
+        if scope.parent and not (scope.parent.begin <= scope.begin and scope.end <= scope.parent.end):
+            yield 'scope (%d, %d) is not within its parent (%d, %d)' % (scope.begin, scope.end, scope.parent.begin, scope.parent.end)
+    for position in positions:
+        containing = [(scope.begin, -scope.end) for scope in tree.scopes if scope.begin <= position <= scope.end]
+        expected = max(containing) if containing else None
+        actual = tree.containing(position)
+        actual = (actual.begin, -actual.end) if actual else None
+        if expected != actual:
+            yield 'innermost scope containing %d is %r, expected %r' % (position, actual, expected)
+
+def movements(demarcation_, selections):
+    # NOTE: scope trees are traversed through siblings, as when transposing functions or classes
+    traversal = engines().SiblingTraversal(demarcation_.tree) if hasattr(demarcation_, 'tree') else RegionTraversal(demarcation_)
+    return [
+        [movement(RegionMovement(demarcation_), forward, selection) for selection in selections]
+        + [expansion(RegionExpansion(demarcation_), forward, complete, selection)
+            for selection in selections for complete in [False, True]]
+        + [(region.a, region.b) for region in
+            [traversal.next(selection) if forward else traversal.prev(selection) for selection in selections]]
+        for forward in [False, True]
+    ]
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return result, time.time() - start
+
+def fuzz(view, name, trials, rng):
+    """Returns the failures of an engine and the law violations that it shares with its reference,
+    along with the total seconds spent in the reference and candidate"""
+    syntax, reference_factory, candidate_factory = ENGINES[name]
+    engine = engines()
+    view.assign_syntax(SYNTAXES[syntax])
+    failures = []
+    shared = []
+    reference_time = candidate_time = 0
+    for trial in range(trials):
+        text = GENERATORS[syntax](rng)
+        view.run_command('select_all')
+        view.run_command('left_delete')
+        view.run_command('append', {'characters': text})
+        size = view.size()
+        positions = list(range(size + 1))
+        selections = [sublime.Region(rng.randint(0, size), rng.randint(0, size)) for i in range(rng.randint(1, 4))]
+        view.add_regions('bookmarks', sorted([sublime.Region(rng.randint(0, size), rng.randint(0, size)) 
+            for i in range(rng.randint(0, 6))], key=lambda region: region.begin()), '', '', sublime.HIDDEN)
+        reference, elapsed = timed(reference_factory, engine, view)
+        reference_time += elapsed
+        candidate, elapsed = timed(candidate_factory, engine, view)
+        candidate_time += elapsed
+        for is_shared, violation in violations(reference, candidate, positions):
+            (shared if is_shared else failures).append('%s: %s in %r' % (name, violation, text))
+        if hasattr(candidate, 'tree'):
+            failures.extend('%s: %s in %r' % (name, violation, text) for violation in containment_violations(candidate.tree, positions))
+        expected, elapsed = timed(movements, reference, selections)
+        reference_time += elapsed
+        actual, elapsed = timed(movements, candidate, selections)
+        candidate_time += elapsed
+        if expected != actual:
+            failures.append('%s: movements of %r differ in %r' % (name, selections, text))
+    return failures, shared, reference_time, candidate_time
+
+def report(view, names, trials, rng):
+    """Fuzzes engines within a view, returning the lines of a report and the total number of failures"""
+    lines = []
+    total = 0
+    for name in names:
+        failures, shared, reference_time, candidate_time = fuzz(view, name, trials, rng)
+        total += len(failures)
+        lines.append('%s: %d failures, %d law violations shared with the reference, reference %.3fs, candidate %.3fs (%.1fx)' % (
+            name, len(failures), len(shared), reference_time, candidate_time, reference_time / max(candidate_time, 1e-9)))
+        lines.extend('    ' + failure for failure in failures[:10])
+    return lines, total
+
+class FuzzDemarcationsCommand(sublime_plugin.WindowCommand):
+    def run(self, trials=100, seed=None, engines=None):
+        sublime.set_timeout_async(partial(self.fuzz, trials, seed, engines or sorted(ENGINES)), 0)
+    def fuzz(self, trials, seed, names):
+        rng = random.Random(seed)
+        view = self.window.create_output_panel('contextual_move_fuzz')
+        view.settings().set('word_separators', engines().DEFAULT_WORD_SEPARATORS)
+        def editor_snapshot(line):
+            view.run_command('select_all')
+            view.run_command('left_delete')
+            view.run_command('append', {'characters': line})
+            return view
+        lines = corpus_report({'tokenizer': tokenizer_snapshot, 'editor': editor_snapshot})[0]
+        lines.extend(report(view, names, trials, rng)[0])
+        self.window.destroy_output_panel('contextual_move_fuzz')
+        panel = self.window.create_output_panel('contextual_move')
+        panel.run_command('append', {'characters': '\n'.join(lines) + '\n'})
+        self.window.run_command('show_panel', {'panel': 'output.contextual_move'})
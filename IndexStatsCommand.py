@@ -0,0 +1,37 @@
+import sublime, sublime_plugin
+
+try:
+    from .indexregistry import index_registry
+    from .MoveByScopeCommand import load_times
+except ValueError: # HACK: for ST2 compatability
+    from indexregistry import index_registry
+    from MoveByScopeCommand import load_times
+
+def megabytes(size):
+    return '%.2fMB' % (size / (1024.0 * 1024.0))
+
+def milliseconds(seconds):
+    return '%.1fms' % (seconds * 1000) if seconds is not None else 'not loaded yet'
+
+class IndexStatsCommand(sublime_plugin.WindowCommand):
+    """Reports memory held by cached indexes, the hit rate of the cache, the number of views evicted from it,
+    and the time spent loading the plugin and its demarcation engines"""
+    def run(self):
+        names = {view.id(): view.file_name() or view.name() or 'untitled'
+            for window in sublime.windows() for view in window.views()}
+        usage = index_registry.usage()
+        lines = [
+            'total: %s of %s' % (megabytes(sum(sum(sizes.values()) for sizes in usage.values())), megabytes(index_registry.budget)),
+            'hit rate: %.1f%% (%d hits, %d misses)' % (100 * index_registry.hit_rate(), index_registry.hits, index_registry.misses),
+            'evictions: %d' % index_registry.evictions,
+            'load time: %s, engines on first use: %s' % (
+                milliseconds(load_times.get('MoveByScopeCommand')), milliseconds(load_times.get('engines'))),
+            '',
+        ]
+        for view_id, sizes in reversed(list(usage.items())):
+            lines.append('%s: %s' % (names.get(view_id, 'closed view %d' % view_id), megabytes(sum(sizes.values()))))
+            for (kind, key), size in sorted(sizes.items()):
+                lines.append('    %s %s: %s' % (kind, key, megabytes(size)))
+        panel = self.window.create_output_panel('contextual_move')
+        panel.run_command('append', {'characters': '\n'.join(lines) + '\n'})
+        self.window.run_command('show_panel', {'panel': 'output.contextual_move'})
@@ -4,17 +4,57 @@
 Contents modified from Alexander Schepanovski's Reform plugin, credit goes to him: https://github.com/Suor/sublime-reform
 """
 
+import time
+load_started = time.time()
+
 import re
+import sys
 import sublime, sublime_plugin
 ST3 = sublime.version() >= '3000'
 
-from functools import partial, reduce
-from itertools import takewhile, chain
+from functools import partial
 
 try:
     from .funcy import *
+    from .indexregistry import index_registry, DEFAULT_BUDGET
 except ValueError: # HACK: for ST2 compatability
     from funcy import * 
+    from indexregistry import index_registry, DEFAULT_BUDGET
+
+# SECTION: LAZY LOADING
+'''
+The plugin is reloaded often (e.g. whenever the package updates), and its load time adds to editor startup.
+So only commands, listeners, and the functions that compose them are defined when the plugin loads.
+Demarcation engines and language specs live within the "engines" package, which is imported on first use.
+The editor only reloads modules at the root of the package, so the "engines" package is purged whenever this module loads, 
+otherwise it would keep the index registry and project index of the previous load (the latter already shut down).
+'''
+load_times = {} # module name -> seconds spent importing it
+
+def purge_engines():
+    prefix = (__package__ + '.' if __package__ else '') + 'engines'
+    for name in [name for name in sys.modules if name == prefix or name.startswith(prefix + '.')]:
+        del sys.modules[name]
+
+purge_engines()
+
+def engines():
+    """Returns the module that defines demarcation engines, importing it on first use"""
+    started = time.time()
+    try:
+        from .engines import demarcations
+    except ValueError: # HACK: for ST2 compatability
+        from engines import demarcations
+    load_times.setdefault('engines', time.time() - started) # NOTE: later calls only look the module up
+    return demarcations
+
+def indexcache():
+    """Returns the module that persists boundary indexes, which can be imported without the demarcation engines"""
+    try:
+        from .engines import indexcache
+    except ValueError: # HACK: for ST2 compatability
+        from engines import indexcache
+    return indexcache
 
 '''
 NOTE: Our design goal is to commute the diagram in "CATEGORY.png" using our implementation.
@@ -41,11 +81,28 @@ This approach allows us to define both kinds of region types using a single comm
 
 
 class MoveByScopeCommand(sublime_plugin.TextCommand):
-    def run(self, edit, forward, by, extend = False, complete = False, delete = False, to_end = False, demarcator=''):
-        demarcation_ = demarcation(self.view, by, demarcator)
-        if to_end:
+    def run(self, edit, forward, by, extend = False, complete = False, delete = False, to_end = False, demarcator='', 
+            across_files = None, nesting = None):
+        if across_files is None:
+            across_files = self.view.settings().get('contextual_move_across_files', False)
+        engine = engines()
+        demarcation_ = engine.prepared_demarcation(self.view, 'move_by_scope', dict(forward=forward, by=by, 
+            extend=extend, complete=complete, delete=delete, to_end=to_end, demarcator=demarcator, 
+            across_files=across_files, nesting=nesting))
+        if demarcation_ is None: return
+        if nesting and by in engine.SCOPE_TREE_TYPES:
+            set_selection(self.view, 
+                map(partial(nested_movement, engine.scope_tree(self.view, by, demarcation_), nesting, forward, extend), 
+                    self.view.sel()))
+        elif to_end:
             end_position = self.view.size()-1 if forward else 0
             end = sublime.Region(end_position, end_position)
+            if getattr(demarcation_, 'window', None): 
+                # NOTE: only text near the selection was searched within a large file, so search near the end instead
+                try:
+                    demarcation_ = engine.demarcation(self.view, by, demarcator, near=[end])
+                except engine.BudgetExceeded as error:
+                    return sublime.status_message(str(error))
             set_selection(self.view, [movement(RegionMovement(demarcation_), not forward, end)])
         elif extend:
             set_selection(self.view, 
@@ -61,6 +118,10 @@ class MoveByScopeCommand(sublime_plugin.TextCommand):
                 map(partial(completion, demarcation_, forward), 
                     self.view.sel()))
         else:
+            selections = self.view.sel()
+            if (across_files and by in ('functions', 'classes') and len(selections) == 1 
+                    and is_past_last_scope(self.view, demarcation_, forward, selections[0])):
+                return move_across_files(engine.project_index, self.view, by, forward)
             set_selection(self.view, 
                 map(partial(movement, RegionMovement(demarcation_), forward), 
                     self.view.sel()))
@@ -68,16 +129,21 @@ class MoveByScopeCommand(sublime_plugin.TextCommand):
     
 class IndentScopeCommand(sublime_plugin.TextCommand):
     def run(self, edit, forward, by, demarcator=''):
-        demarcation_ = demarcation(self.view, by, demarcator)
+        demarcation_ = engines().prepared_demarcation(self.view, 'indent_scope', dict(forward=forward, by=by, demarcator=demarcator))
+        if demarcation_ is None: return
         set_replacements(self.view, edit,
             map(partial(indentation, RegionTraversal(demarcation_), self.view, forward), 
                 self.view.sel()))
 
 class TransposeByScopeCommand(sublime_plugin.TextCommand):
     def run(self, edit, forward, by, demarcator=''):
-        demarcation_ = demarcation(self.view, by, demarcator)
+        engine = engines()
+        demarcation_ = engine.prepared_demarcation(self.view, 'transpose_by_scope', dict(forward=forward, by=by, demarcator=demarcator))
+        if demarcation_ is None: return
+        traversal = (engine.SiblingTraversal(engine.scope_tree(self.view, by, demarcation_)) if by in engine.SCOPE_TREE_TYPES 
+            else RegionTraversal(demarcation_))
         set_replacements(self.view, edit,
-            map(partial(transposition, RegionTraversal(demarcation_), self.view, forward), 
+            map(partial(transposition, traversal, self.view, forward), 
                 self.view.sel()))
 
 # SECTION: FUNCTIONS WITH SIDE EFFECTS THAT ARE USED TO COMPOSE COMMANDS
@@ -115,6 +181,33 @@ def set_replacements(view, edit, replacements):
         offset += len(replacement.text) - replacement.region.size()
     set_selection(view, selections)
 
+pending_positions = {} # path -> position of the cursor once the file loads
+
+def is_past_last_scope(view, demarcation, forward, current):
+    window = getattr(demarcation, 'window', None)
+    if window and not (window.end() >= view.size() if forward else window.begin() <= 0):
+        return False # NOTE: only text near the selection was searched, so the view may have more scopes beyond it
+    beginnings = demarcation.declaration_beginnings
+    if not beginnings: return True
+    if forward: return current.end() >= demarcation.nextend(max(beginnings))
+    else: return current.begin() <= min(beginnings)
+
+def move_across_files(project_index, view, type, forward):
+    snapshot = project_index.snapshot
+    path = snapshot.neighbour(view.file_name() or '', type, forward)
+    if path is None:
+        return sublime.status_message('ContextualMove: no other indexed file contains %s' % type)
+    declarations = snapshot.declarations(path, type)
+    position = declarations[0] if forward else declarations[-1]
+    window = view.window()
+    target = window.find_open_file(path)
+    if target is None:
+        pending_positions[path] = position
+        window.open_file(path)
+    else:
+        window.focus_view(target)
+        set_selection(target, [sublime.Region(position, position)])
+
 # SECTION: PURE FUNCTIONS THAT ARE USED TO MAP SELECTIONS
 def movement(movement, forward, current):
     if forward: return movement.next(current)
@@ -124,6 +217,21 @@ def completion(demarcation, forward, current):
     if forward: return sublime.Region(demarcation.prevbegin(current.begin()), demarcation.nextend(current.end())) 
     else: return sublime.Region(demarcation.nextend(current.end()), demarcation.prevbegin(current.end()))
 
+def nested_movement(tree, nesting, forward, extend, current):
+    position = current.b
+    scope = tree.containing(position)
+    if nesting == 'parent':
+        target = scope.parent if scope and scope.begin == position else scope
+    elif nesting == 'child':
+        children = scope.children if scope else tree.roots
+        target = first(children if forward else reversed(children))
+    else: # nesting == 'sibling'
+        siblings = tree.siblings(scope) if scope else tree.roots
+        target = (first(sibling for sibling in siblings if position < sibling.begin) if forward 
+            else last([sibling for sibling in siblings if sibling.begin < position]))
+    destination = target.begin if target else position
+    return sublime.Region(current.a if extend else destination, destination)
+
 def expansion(expansion_, forward, complete, current):
     if current.size() < 1 and complete: return completion(expansion_.demarcation, forward, current)
     else: return expansion_.next(current) if forward else expansion_.prev(current)
@@ -171,141 +279,63 @@ def transposition(traversal, view, forward, current):
     else:
         return Replacement(source.cover(destination), bottom+middle+top, offset_region(current, offset))
 
-# SECTION: MISCELLANEOUS FUNCTIONS AND STRUCTURES THAT ARE USED TO COMPOSE COMMANDS
-def demarcation(view, type, demarcator=''):
-    language = source(view)
-    functions = {
-        'python': lambda: PythonScopeDemarcation(view, 
-                [declaration
-                    for declaration in view.find_by_selector('meta.function')
-                    if not re_test(r'^(lambda|\s*\@)', view.substr(declaration))]
-            ),
-        'c++': lambda: CLikeScopeDemarcation(
-                view.size(),
-                chain(view.find_by_selector('meta.method'), view.find_by_selector('meta.function')),
-                view.find_by_selector('punctuation.section.block.end'),
-                chain(
-                    view.find_by_selector('meta.template'), 
-                    view.find_by_selector('punctuation.definition.comment'),
-                    view.find_by_selector('storage.type'),
-                    view.find_by_selector('storage.modifier')
-                )
-            ),
-        'c': lambda: CLikeScopeDemarcation(
-                view.size(),
-                view.find_by_selector('meta.function'),
-                view.find_by_selector('punctuation.section.block.end'),
-                chain(
-                    view.find_by_selector('punctuation.definition.comment'),
-                    view.find_by_selector('storage.type'),
-                    view.find_by_selector('storage.modifier')
-                )
-            ),
-        'js': lambda: CLikeScopeDemarcation(
-                view.size(),
-                [beginning
-                    for beginning in chain(
-                        view.find_all(r'([\t ]*(?:\w+ *:|(?:(?:var|let|const) +)?[\w.]+ *=) *)?\bfunction\b'), 
-                        view.find_by_selector('meta.class-method'))
-                    if not is_escaped(view, beginning.a)],
-                view.find_by_selector('punctuation.section.block.end'),
-                view.find_by_selector('punctuation.definition.comment')
-            ),
-        'r': lambda: CLikeScopeDemarcation(
-                view.size(),
-                [beginning
-                    for beginning in view.find_all(r'([\t ]*(?:\w+ *:|(?: +)?[\w.]+ *=) *)?\bfunction\b')
-                    if not is_escaped(view, beginning.a)],
-                view.find_by_selector('punctuation.section.braces.end'),
-                view.find_by_selector('punctuation.definition.comment')
-            ),
-        'java': lambda: CLikeScopeDemarcation(
-                view.size(),
-                chain(view.find_by_selector('meta.method'), view.find_by_selector('meta.function')),
-                view.find_by_selector('punctuation.section.block.end'),
-                chain(
-                    view.find_by_selector('punctuation.definition.comment'),
-                    view.find_by_selector('storage.type'),
-                    view.find_by_selector('storage.modifier')
-                )
-            ),
-        'cs': lambda: CLikeScopeDemarcation(
-                view.size(),
-                chain(view.find_by_selector('meta.method'), view.find_by_selector('meta.function')),
-                view.find_by_selector('punctuation.section.block.end'),
-                chain(
-                    view.find_by_selector('punctuation.definition.comment'),
-                    view.find_by_selector('storage.type'),
-                    view.find_by_selector('storage.modifier')
-                )
-            ),
-        'clike': lambda: CLikeScopeDemarcation(
-                view.size(),
-                chain(view.find_by_selector('meta.method'), view.find_by_selector('meta.function')),
-                chain(view.find_by_selector('punctuation.section.block.end'), view.find_by_selector('punctuation.section.braces.end')),
-                chain(
-                    view.find_by_selector('punctuation.definition.comment'),
-                    view.find_by_selector('storage.type'),
-                    view.find_by_selector('storage.modifier')
-                )
-            ),
-        'fortran': lambda: CLikeScopeDemarcation(
-                view.size(),
-                view.find_all(r'\bsubroutine\b'),
-                view.find_all(r'\bend subroutine\b'),
-                view.find_by_selector('punctuation.definition.comment')
-            ),
-    }
-    classes = {
-        'python': lambda: PythonScopeDemarcation(view, view.find_by_selector('meta.class')), 
-        'c++': lambda: CLikeScopeDemarcation(
-                view.size(),
-                chain(
-                    view.find_by_selector('meta.class'), 
-                    view.find_by_selector('meta.struct'), 
-                    view.find_by_selector('meta.enum')
-                ),
-                view.find_by_selector('punctuation.section.block.end'),
-                chain(
-                    view.find_by_selector('meta.template'), 
-                    view.find_by_selector('punctuation.definition.comment')
-                )
-            ),
-        'clike': lambda: CLikeScopeDemarcation(
-                view.size(),
-                chain(
-                    view.find_by_selector('meta.class'), 
-                    view.find_by_selector('meta.class.identifier'), 
-                    view.find_by_selector('meta.struct'), 
-                    view.find_by_selector('meta.enum')
-                ),
-                view.find_by_selector('punctuation.section.block.end'),
-                chain(
-                    view.find_by_selector('punctuation.definition.comment'),
-                    view.find_by_selector('storage.modifier')
-                )
-            ),
-        'fortran': lambda: CLikeScopeDemarcation(
-                view.size(),
-                view.find_all(r'\bmodule\b'),
-                view.find_all(r'\bend module\b'),
-                view.find_by_selector('punctuation.definition.comment')
-            ),
-    }
-    return {
-        'subwords': lambda: SubWordDemarcation(view),
-        'words': lambda: WordDemarcation(view),
-        'empty_lines': lambda: EmptyLineDemarcation(view),
-        'tabulations': lambda: CustomDemarcation(view, r'\t'),
-        'parentheses': lambda: CustomDemarcation(view, r'[\\(\\)]'),
-        'brackets': lambda: CustomDemarcation(view, r'\\[|\\]'),
-        'braces': lambda: CustomDemarcation(view, r'[{}]'),
-        'listitems': lambda: ListItemDemarcation(view),
-        'conditionals': lambda: ListItemDemarcation(view),
-        'functions': lambda: functions[language]() if language in functions else functions['clike'](),
-        'classes': lambda: classes[language]() if language in classes else classes['clike'](),
-    }[type]()
+# SECTION: PROJECT WIDE INDEXING
+def is_indexing(view):
+    return view.settings().get('contextual_move_across_files', False)
+
+class ProjectIndexListener(sublime_plugin.EventListener):
+    indexed_windows = set()
+    def on_load(self, view):
+        position = pending_positions.pop(view.file_name(), None)
+        if position is not None:
+            set_selection(view, [sublime.Region(position, position)])
+    def on_load_async(self, view):
+        if is_indexing(view):
+            engines().index_view(view)
+    def on_post_save_async(self, view):
+        if is_indexing(view):
+            engines().index_view(view)
+    def on_activated_async(self, view):
+        if not is_indexing(view): return
+        engine = engines()
+        window = view.window()
+        if view.file_name() and view.file_name() not in engine.project_index.snapshot.files:
+            engine.index_view(view)
+        if (window and window.id() not in self.indexed_windows 
+                and view.settings().get('contextual_move_index_project_folders', False)):
+            self.indexed_windows.add(window.id())
+            engine.project_index.submit_folders(engine.project_folders(window, view.settings()))
+    def on_close(self, view):
+        if 'engines' not in load_times: return # NOTE: nothing can have been indexed yet
+        if view.file_name() and not view.settings().get('contextual_move_index_project_folders', False):
+            engines().project_index.discard(view.file_name())
+
+def plugin_loaded():
+    preferences = sublime.load_settings('Preferences.sublime-settings')
+    def update_budget():
+        index_registry.budget = preferences.get('contextual_move_memory_budget', DEFAULT_BUDGET) * 1024 * 1024
+    preferences.add_on_change('contextual_move_memory_budget', update_budget)
+    update_budget()
+
+def plugin_unloaded():
+    if 'engines' in load_times:
+        engines().project_index.shutdown()
+
+class BoundaryIndexListener(sublime_plugin.EventListener):
+    def on_load_async(self, view):
+        change_count = view.change_count()
+        indexes = indexcache().load(view)
+        if view.change_count() == change_count:
+            for key, index in indexes.items():
+                index_registry.put(view.id(), 'index', key, change_count, index)
+    def on_close(self, view):
+        index_registry.release(view.id())
+        if 'engines' not in load_times: return
+        engine = engines()
+        engine.latest_generations.pop(view.id(), None)
+        engine.finished_demarcations.pop(view.id(), None)
 
+# SECTION: MISCELLANEOUS FUNCTIONS AND STRUCTURES THAT ARE USED TO COMPOSE COMMANDS
 class Replacement:
     def __init__(self, region, text, selection): 
         self.region = region
@@ -360,195 +390,6 @@ class RegionTraversal:
         begin = self.demarcation.prevbegin(end)
         return sublime.Region( begin, end )
 
-# SECTION: CATEGORIES THAT DEFINE TYPES OF REGIONS
-class SubWordDemarcation:
-    """a category of functions mapping positions to region boundaries,
-    effectively providing the definition of a region"""
-    def __init__(self, view):
-        self.view = view
-    def prevbegin(self, position):
-        return self.view.find_by_class(position, False, 
-            sublime.CLASS_SUB_WORD_START  
-            | sublime.CLASS_SUB_WORD_END 
-            | sublime.CLASS_WORD_START  
-            | sublime.CLASS_WORD_END  
-            | sublime.CLASS_PUNCTUATION_START  
-            | sublime.CLASS_PUNCTUATION_END  
-            | sublime.CLASS_LINE_START  
-            | sublime.CLASS_LINE_END  
-            | sublime.CLASS_EMPTY_LINE
-        )
-    def nextend(self, position):
-        return self.view.find_by_class(position, True, 
-            sublime.CLASS_SUB_WORD_START  
-            | sublime.CLASS_SUB_WORD_END  
-            | sublime.CLASS_WORD_START  
-            | sublime.CLASS_WORD_END  
-            | sublime.CLASS_PUNCTUATION_START  
-            | sublime.CLASS_PUNCTUATION_END  
-            | sublime.CLASS_LINE_START  
-            | sublime.CLASS_LINE_END  
-            | sublime.CLASS_EMPTY_LINE
-        )
-
-class WordDemarcation:
-    """a category of functions mapping positions to region boundaries,
-    effectively providing the definition of a region"""
-    def __init__(self, view):
-        self.view = view
-    def prevbegin(self, position):
-        return self.view.find_by_class(position, False, 
-            sublime.CLASS_WORD_START
-            | sublime.CLASS_WORD_END 
-            | sublime.CLASS_PUNCTUATION_START 
-            | sublime.CLASS_PUNCTUATION_END 
-            # | sublime.CLASS_EMPTY_LINE
-            # | sublime.CLASS_LINE_START
-            # | sublime.CLASS_LINE_END
-        )
-    def nextend(self, position):
-        return self.view.find_by_class(position, True, 
-            sublime.CLASS_WORD_START
-            | sublime.CLASS_WORD_END
-            | sublime.CLASS_PUNCTUATION_START 
-            | sublime.CLASS_PUNCTUATION_END 
-            # | sublime.CLASS_EMPTY_LINE
-            # | sublime.CLASS_LINE_START
-            # | sublime.CLASS_LINE_END
-        )
-
-class EmptyLineDemarcation:
-    """a category of functions mapping positions to region boundaries,
-    effectively providing the definition of a region"""
-    def __init__(self, view):
-        self.view = view
-    def prevbegin(self, position):
-        return self.view.find_by_class(position, False, 
-            sublime.CLASS_EMPTY_LINE
-            # | sublime.CLASS_LINE_START
-            # | sublime.CLASS_LINE_END
-        )
-    def nextend(self, position):
-        return self.view.find_by_class(position, True, 
-            sublime.CLASS_EMPTY_LINE
-            # | sublime.CLASS_LINE_START
-            # | sublime.CLASS_LINE_END
-        )
-
-class CustomDemarcation:
-    """a category of functions mapping positions to region boundaries,
-    effectively providing the definition of a region"""
-    def __init__(self, view, demarcator):
-        self.view = view
-        self.demarcator = demarcator
-    def prevbegin(self, position):
-        return max([delimiter.end()
-            for delimiter in self.view.find_all(self.demarcator)
-            if delimiter.end() <= position
-            # NOTE: the line below can be used to match complex list items with parens and bracks, 
-            # but results do not feel very predictable to the user
-            # and braces_match(self.view.substr(sublime.Region(position, delimiter.begin())))
-        ] or [position])
-    def nextend(self, position):
-        return min([delimiter.begin()
-            for delimiter in self.view.find_all(self.demarcator)
-            if position <= delimiter.begin()
-            # NOTE: the line below can be used to match complex list items with parens and bracks, 
-            # but results do not feel very predictable to the user
-            # and braces_match(self.view.substr(sublime.Region(position, delimiter.begin())))
-        ] or [position])
-
-class ListItemDemarcation:
-    """a category of functions mapping positions to region boundaries,
-    effectively providing the definition of a region"""
-    def __init__(self, view):
-        self.view = view
-    def prevbegin(self, position):
-        return max([delimiter.end()
-            for delimiter in self.view.find_all(r'[,([{]\s*')
-            if delimiter.end() <= position
-            # NOTE: the line below can be used to match complex list items with parens and bracks, 
-            # but results do not feel very predictable to the user
-            # and braces_match(self.view.substr(sublime.Region(position, delimiter.begin())))
-        ] or [position])
-    def nextend(self, position):
-        return min([delimiter.begin()
-            for delimiter in self.view.find_all(r'[,)}]')
-            if position <= delimiter.begin()
-            # NOTE: the line below can be used to match complex list items with parens and bracks, 
-            # but results do not feel very predictable to the user
-            # and braces_match(self.view.substr(sublime.Region(position, delimiter.begin())))
-        ] or [position])
-
-class CLikeScopeDemarcation:
-    """a category of functions mapping positions to boundaries for functions within c-like langauges,
-    effectively providing the definition for functions within these languages.
-    Starting boundaries include "predeclarations" such as comments and template constructs, 
-    which may be customized by the user."""
-    def __init__(self, view_size, declarations, braces, predeclarations):
-
-        self.declaration_beginnings = list(declaration.begin() for declaration in declarations)
-        self.brace_endings = list(brace.end() for brace in braces)
-        self.predeclaration_beginnings = list(predeclaration.begin() for predeclaration in predeclarations)
-        self.view_size = view_size
-    def nextend(self, position):
-        braces = [ending 
-            for ending in self.brace_endings
-            if position <= ending]
-        nearest_valid_beginning = min([beginning 
-            for beginning in self.declaration_beginnings
-            if position < beginning
-            and [brace for brace in braces if brace < beginning]] 
-            or [self.view_size-1])
-        return max([brace 
-            for brace in braces 
-            if brace < nearest_valid_beginning] or [position])
-    def prevbegin(self, position):
-        declaration = max([declaration 
-            for declaration in self.declaration_beginnings
-            if declaration <= position] 
-            or [min(self.declaration_beginnings or [position])])
-        previous_brace = max([ending
-            for ending in self.brace_endings
-            if ending < declaration] or [0])
-        predeclaration = min([predeclaration 
-            for predeclaration in self.predeclaration_beginnings
-            if previous_brace < predeclaration and predeclaration <= position] or [declaration]) 
-        return min([predeclaration, declaration])
-
-class PythonScopeDemarcation:
-    def __init__(self, view, declarations):
-        self.view = view
-        self.declaration_beginnings = list(declaration.begin() for declaration in declarations)
-    def prevbegin(self, position):
-        view = self.view
-        return max([declaration 
-            for declaration in self.declaration_beginnings
-            if declaration <= position]
-            or [min(self.declaration_beginnings or [position])])
-    def nextend(self, position):
-        view = self.view
-        tab_size = view.settings().get('tab_size', 4)
-        def indent_length(line_region):
-            line_text = view.substr(line_region)
-            indentation = re.search(r'^\s*', line_text).group() or ''
-            indent_length_ = indentation.count('\t')*tab_size + indentation.count(' ')
-            return indent_length_
-        endings = [
-            max([line.end()
-                 for line in view.lines(sublime.Region(position, declaration))
-                 if  indent_length(view.line(declaration)) < indent_length(line)]
-                 or [view.size() -1])
-            for declaration in chain(self.declaration_beginnings, [view.size()-1])
-            if position < declaration
-        ]
-        return min([ending
-            for ending in endings
-            if position < ending])
-
-
-
-
 # SECTION: FUNCTIONS THAT HELP WORK WITH PREDEFINED REGION TYPES (FUNCTIONS, CLASSES, ETC.)
 def offset_region(region, offset):
     return sublime.Region(region.a + offset, region.b + offset)
@@ -574,27 +415,4 @@ def invert_regions(view, regions):
 
     return result
 
-
-def cursor_pos(view):
-    return view.sel()[0].b
-
-### Scope
-def scope_name(view, pos=None):
-    if pos is None:
-        pos = cursor_pos(view)
-    return view.scope_name(pos)
-
-def parsed_scope(view, pos=None):
-    return parse_scope(scope_name(view, pos))
-
-def source(view, pos=None):
-    return first(vec[1] for vec in parsed_scope(view, pos) if vec[0] == 'source')
-
-def parse_scope(scope_name):
-    return [name.split('.') for name in scope_name.split()]
-
-def is_escaped(view, pos):
-    return any(s[0] in ('comment', 'string') for s in parsed_scope(view, pos))
-
-def braces_match(text):
-    return text.count('(') == text.count(')') and text.count('[') == text.count(']') and text.count('{') == text.count('}')
\ No newline at end of file
+load_times['MoveByScopeCommand'] = time.time() - load_started
\ No newline at end of file
@@ -0,0 +1,4 @@
+"""
+Modules that are imported on first use rather than when the plugin loads.
+Sublime Text only loads python files at the root of a package, so nothing here is imported until a command needs it.
+"""
@@ -0,0 +1,1098 @@
+# -*- coding: utf-8 -*-
+
+"""
+Demarcation engines, which map positions to the boundaries of regions of each type (see "CATEGORY.png").
+
+This module and the language specs it relies on are imported on first use by "MoveByScopeCommand",
+rather than when the plugin loads, since the plugin is reloaded often and its load time adds to editor startup.
+"""
+
+import os
+import re
+import time
+import codecs
+import difflib
+import threading
+import traceback
+import sublime
+
+from itertools import chain
+from bisect import bisect_left, bisect_right
+
+try:
+    from ..funcy import *
+    from ..indexregistry import index_registry
+    from . import indexcache
+    from .tokenizer import LineSnapshot, DEFAULT_WORD_SEPARATORS, line_starts
+    from .languages import *
+    from .projectindex import project_index, TYPES as PROJECT_INDEX_TYPES
+except ValueError: # HACK: for ST2 compatability
+    from funcy import * 
+    from indexregistry import index_registry
+    import indexcache
+    from tokenizer import LineSnapshot, DEFAULT_WORD_SEPARATORS, line_starts
+    from languages import *
+    from projectindex import project_index, TYPES as PROJECT_INDEX_TYPES
+
+# SECTION: MISCELLANEOUS FUNCTIONS AND STRUCTURES THAT ARE USED TO COMPOSE COMMANDS
+is_anonymous = re_tester(r'^(lambda|\s*\@)')
+
+def demarcation(view, type, demarcator='', indexed=True, near=None, token=None):
+    """Returns the demarcation of a type for a view. 
+    Within large files, only the text near the given regions (by default, the selection) is searched.
+    If a CancellationToken is given, it is checked between queries of the view, so that stale builds stop early."""
+    language = source(view)
+    policy = LargeFilePolicy(view)
+    if indexed and policy.degraded and type in WINDOWED_DEMARCATIONS:
+        sublime.status_message('ContextualMove: large file, searching %s within %d characters of the cursor' 
+            % (type, policy.window_size))
+        return windowed_demarcation(view, type, language, resolve_demarcator(view, demarcator), 
+            policy.window(view.sel() if near is None else near), Deadline(policy.time_budget, token))
+    def find_by_selector(selector):
+        if token: token.check()
+        return view.find_by_selector(selector)
+    def find_all(pattern):
+        if token: token.check()
+        return view.find_all(pattern)
+    functions = {
+        'python': lambda: PythonScopeDemarcation(view, 
+                [declaration
+                    for declaration in find_by_selector('meta.function')
+                    if not is_anonymous(view.substr(declaration))]
+            ),
+        'c++': lambda: CLikeScopeDemarcation(
+                view.size(),
+                chain(find_by_selector('meta.method'), find_by_selector('meta.function')),
+                find_by_selector('punctuation.section.block.end'),
+                chain(
+                    find_by_selector('meta.template'), 
+                    find_by_selector('punctuation.definition.comment'),
+                    find_by_selector('storage.type'),
+                    find_by_selector('storage.modifier')
+                )
+            ),
+        'c': lambda: CLikeScopeDemarcation(
+                view.size(),
+                find_by_selector('meta.function'),
+                find_by_selector('punctuation.section.block.end'),
+                chain(
+                    find_by_selector('punctuation.definition.comment'),
+                    find_by_selector('storage.type'),
+                    find_by_selector('storage.modifier')
+                )
+            ),
+        'js': lambda: CLikeScopeDemarcation(
+                view.size(),
+                [beginning
+                    for beginning in chain(
+                        find_all(r'([\t ]*(?:\w+ *:|(?:(?:var|let|const) +)?[\w.]+ *=) *)?\bfunction\b'), 
+                        find_by_selector('meta.class-method'))
+                    if not is_escaped(view, beginning.a)],
+                find_by_selector('punctuation.section.block.end'),
+                find_by_selector('punctuation.definition.comment')
+            ),
+        'r': lambda: CLikeScopeDemarcation(
+                view.size(),
+                [beginning
+                    for beginning in find_all(r'([\t ]*(?:\w+ *:|(?: +)?[\w.]+ *=) *)?\bfunction\b')
+                    if not is_escaped(view, beginning.a)],
+                find_by_selector('punctuation.section.braces.end'),
+                find_by_selector('punctuation.definition.comment')
+            ),
+        'java': lambda: CLikeScopeDemarcation(
+                view.size(),
+                chain(find_by_selector('meta.method'), find_by_selector('meta.function')),
+                find_by_selector('punctuation.section.block.end'),
+                chain(
+                    find_by_selector('punctuation.definition.comment'),
+                    find_by_selector('storage.type'),
+                    find_by_selector('storage.modifier')
+                )
+            ),
+        'cs': lambda: CLikeScopeDemarcation(
+                view.size(),
+                chain(find_by_selector('meta.method'), find_by_selector('meta.function')),
+                find_by_selector('punctuation.section.block.end'),
+                chain(
+                    find_by_selector('punctuation.definition.comment'),
+                    find_by_selector('storage.type'),
+                    find_by_selector('storage.modifier')
+                )
+            ),
+        'clike': lambda: CLikeScopeDemarcation(
+                view.size(),
+                chain(find_by_selector('meta.method'), find_by_selector('meta.function')),
+                chain(find_by_selector('punctuation.section.block.end'), find_by_selector('punctuation.section.braces.end')),
+                chain(
+                    find_by_selector('punctuation.definition.comment'),
+                    find_by_selector('storage.type'),
+                    find_by_selector('storage.modifier')
+                )
+            ),
+        'fortran': lambda: CLikeScopeDemarcation(
+                view.size(),
+                find_all(r'\bsubroutine\b'),
+                find_all(r'\bend subroutine\b'),
+                find_by_selector('punctuation.definition.comment')
+            ),
+    }
+    classes = {
+        'python': lambda: PythonScopeDemarcation(view, find_by_selector('meta.class')), 
+        'c++': lambda: CLikeScopeDemarcation(
+                view.size(),
+                chain(
+                    find_by_selector('meta.class'), 
+                    find_by_selector('meta.struct'), 
+                    find_by_selector('meta.enum')
+                ),
+                find_by_selector('punctuation.section.block.end'),
+                chain(
+                    find_by_selector('meta.template'), 
+                    find_by_selector('punctuation.definition.comment')
+                )
+            ),
+        'clike': lambda: CLikeScopeDemarcation(
+                view.size(),
+                chain(
+                    find_by_selector('meta.class'), 
+                    find_by_selector('meta.class.identifier'), 
+                    find_by_selector('meta.struct'), 
+                    find_by_selector('meta.enum')
+                ),
+                find_by_selector('punctuation.section.block.end'),
+                chain(
+                    find_by_selector('punctuation.definition.comment'),
+                    find_by_selector('storage.modifier')
+                )
+            ),
+        'fortran': lambda: CLikeScopeDemarcation(
+                view.size(),
+                find_all(r'\bmodule\b'),
+                find_all(r'\bend module\b'),
+                find_by_selector('punctuation.definition.comment')
+            ),
+    }
+    functions_ = functions[language] if language in functions else functions['clike']
+    tokenized = view.settings().get('contextual_move_python_tokenizer', False)
+    classes_ = classes[language] if language in classes else classes['clike']
+    return {
+        'subwords': lambda: TokenizedDemarcation(view, SUB_WORD_CLASSES) if tokenized else SubWordDemarcation(view),
+        'words': lambda: TokenizedDemarcation(view, WORD_CLASSES) if tokenized else WordDemarcation(view),
+        'empty_lines': lambda: EmptyLineDemarcation(view),
+        'tabulations': lambda: CustomDemarcation(view, r'\t', token=token),
+        'parentheses': lambda: CustomDemarcation(view, r'[\\(\\)]', token=token),
+        'brackets': lambda: CustomDemarcation(view, r'\\[|\\]', token=token),
+        'braces': lambda: CustomDemarcation(view, r'[{}]', token=token),
+        'custom': lambda: CustomDemarcation(view, resolve_demarcator(view, demarcator), token=token),
+        'listitems': lambda: ListItemDemarcation(view),
+        'conditionals': lambda: ListItemDemarcation(view),
+        'bookmarks': lambda: RegionListDemarcation(*bookmark_index(view)),
+        'modifications': lambda: RegionListDemarcation(*modification_index(view)),
+        'misspellings': lambda: misspelling_demarcation(view, view.sel() if near is None else near),
+        'functions': lambda: indexed_demarcation(view, type, language, functions_) if indexed else functions_(),
+        'classes': lambda: indexed_demarcation(view, type, language, classes_) if indexed else classes_(),
+    }[type]()
+
+# SECTION: ASYNCHRONOUS DEMARCATIONS
+'''
+Building a demarcation can take a long time (e.g. for a huge file, or a syntax that requires many selector queries).
+To keep the UI responsive, demarcations are built on the async thread while the command waits for a short latency budget. 
+If the build finishes within budget, the command proceeds as usual. Otherwise the command returns immediately,
+shows a spinner in the status bar, and runs again once the build completes, reusing the finished demarcation.
+Each build holds a CancellationToken, which is invalidated when a newer command arrives for the view,
+the buffer changes, or the selection moves, so that stale builds are skipped and their results are never applied 
+(e.g. a deferred delete never applies to a selection that the user has since moved).
+Running builds check their token between selector queries and while scanning regex matches, 
+and stop as soon as it is invalidated.
+'''
+SYNCHRONOUS_DEMARCATIONS = [
+    'subwords', 'words', 'empty_lines', 'listitems', 'conditionals', # NOTE: these are lazy, so they are cheap to build (but see "is_synchronous")
+    'bookmarks', 'misspellings', # NOTE: these must be built on the UI thread
+]
+TOKENIZED_DEMARCATIONS = ['subwords', 'words']
+DEFAULT_LATENCY_BUDGET = 30 # milliseconds
+SPINNER = '|/-\\'
+
+latest_generations = {} # view id -> generation of the latest command to request a demarcation
+finished_demarcations = {} # view id -> ((change count, type, demarcator), demarcation)
+
+class Cancelled(Exception):
+    pass
+
+def selection_key(view):
+    return [(region.a, region.b) for region in view.sel()]
+
+class CancellationToken:
+    def __init__(self, view):
+        self.view = view
+        self.change_count = view.change_count()
+        self.selection = selection_key(view)
+        self.generation = latest_generations.get(view.id(), 0) + 1
+        latest_generations[view.id()] = self.generation
+    def is_cancelled(self):
+        return (latest_generations.get(self.view.id()) != self.generation 
+            or self.view.change_count() != self.change_count
+            or selection_key(self.view) != self.selection)
+    def check(self):
+        if self.is_cancelled(): raise Cancelled()
+
+def is_synchronous(view, type):
+    """Returns whether a demarcation is cheap enough to build on the UI thread. 
+    Tokenized words and subwords must copy the text of the view, so they are only cheap once a snapshot exists."""
+    if type in TOKENIZED_DEMARCATIONS and view.settings().get('contextual_move_python_tokenizer', False):
+        return has_line_snapshot(view)
+    return type in SYNCHRONOUS_DEMARCATIONS
+
+def prepared_demarcation(view, command, args):
+    """Returns the demarcation required by a command, 
+    or None if it is still being built, in which case the command will be run again with the same arguments once it is"""
+    by = args['by']
+    demarcator = args.get('demarcator', '')
+    key = (view.change_count(), by, demarcator)
+    finished = finished_demarcations.pop(view.id(), None)
+    if finished and finished[0] == key:
+        return finished[1]
+    token = CancellationToken(view)
+    if is_synchronous(view, by):
+        return demarcation(view, by, demarcator)
+    done = threading.Event()
+    result = {}
+    def build():
+        try:
+            token.check()
+            result['demarcation'] = demarcation(view, by, demarcator, token=token)
+        except (BudgetExceeded, Cancelled) as error:
+            result['error'] = error
+        except Exception as error:
+            result['error'] = error
+            result['traceback'] = traceback.format_exc()
+        finally:
+            done.set()
+            sublime.set_timeout(resume, 0)
+    def resume():
+        if result.pop('consumed', False): return
+        view.erase_status('contextual_move')
+        if 'error' in result or token.is_cancelled(): 
+            return report(by, result)
+        finished_demarcations[view.id()] = (key, result['demarcation'])
+        view.run_command(command, args)
+    sublime.set_timeout_async(build, 0)
+    if done.wait(view.settings().get('contextual_move_latency_budget', DEFAULT_LATENCY_BUDGET) / 1000.0):
+        result['consumed'] = True # NOTE: resume() runs on this thread, so it cannot run before we get here
+        report(by, result)
+        return result.get('demarcation')
+    spin(view, by, token, done, 0)
+    return None
+
+def report(type, result):
+    """Tells the user why a demarcation could not be built, if it failed for any reason other than cancellation"""
+    error = result.get('error')
+    if isinstance(error, BudgetExceeded):
+        sublime.status_message(str(error))
+    elif 'traceback' in result:
+        print(result['traceback'])
+        sublime.status_message('ContextualMove: failed to find %s (%r), see the console for details' % (type, error))
+
+def spin(view, type, token, done, frame):
+    if done.is_set() or token.is_cancelled(): 
+        return view.erase_status('contextual_move')
+    view.set_status('contextual_move', 'ContextualMove: finding %s %s' % (type, SPINNER[frame % len(SPINNER)]))
+    sublime.set_timeout(lambda: spin(view, type, token, done, frame+1), 100)
+
+# SECTION: BOUNDARY INDEX CACHES
+'''
+Demarcations for functions and classes are expensive to build, 
+but their boundaries can be stored as sorted arrays of offsets, which we call "boundary indexes".
+Indexes are kept in the index registry for as long as their view remains unchanged, 
+and are persisted to disk so that reopening an unchanged file does not require rebuilding them.
+'''
+
+def index_key(type, language):
+    return '%s.%s' % (type, language)
+
+def indexed_demarcation(view, type, language, build):
+    key = index_key(type, language)
+    change_count = view.change_count()
+    index = index_registry.get(view.id(), 'index', key, change_count)
+    if index is None:
+        index = index_registry.put(view.id(), 'index', key, change_count, build().index())
+        persist_indexes(view)
+    return index_demarcation(view, language, index)
+
+def index_demarcation(view, language, index):
+    """Returns the demarcation of functions or classes described by a boundary index, 
+    whether it was just built or loaded from the disk cache"""
+    if language == 'python':
+        return PythonScopeDemarcation.from_index(view, index)
+    else:
+        return CLikeScopeDemarcation.from_index(view.size(), index)
+
+def persist_indexes(view):
+    indexes = index_registry.values(view.id(), 'index', view.change_count())
+    sublime.set_timeout_async(lambda: indexcache.save(view, indexes), 0)
+
+# SECTION: CUSTOM DEMARCATORS
+'''
+Custom demarcations separate regions using a regular expression, which is either given directly
+or named within the "contextual_move_demarcators" setting, e.g. {"headings": "^#+ ", "documents": "^---$"}.
+Patterns are compiled once, and the offsets of their matches are cached for each version of a view,
+so that moving by custom regions never searches the buffer more than once per edit.
+'''
+compiled_demarcators = {}
+
+def resolve_demarcator(view, demarcator):
+    return (view.settings().get('contextual_move_demarcators') or {}).get(demarcator, demarcator)
+
+def compiled_demarcator(pattern):
+    if pattern not in compiled_demarcators:
+        compiled_demarcators[pattern] = re.compile(pattern, re.MULTILINE)
+    return compiled_demarcators[pattern]
+
+def custom_index(view, pattern, token=None):
+    index = index_registry.get(view.id(), 'custom', pattern, view.change_count())
+    if index is not None:
+        return index
+    try:
+        regex = compiled_demarcator(pattern)
+    except re.error as error:
+        sublime.status_message('ContextualMove: invalid demarcator %r: %s' % (pattern, error))
+        return [], []
+    matches = []
+    is_zero_width = False
+    for count, match in enumerate(regex.finditer(view.substr(sublime.Region(0, view.size())))):
+        if token and count % 4096 == 0: token.check()
+        if match.end() > match.start():
+            matches.append(match.span())
+        else:
+            is_zero_width = True # NOTE: empty matches would make every offset a boundary (e.g. for "" or "x*")
+    if is_zero_width and not matches:
+        sublime.status_message('ContextualMove: demarcator %r only matches empty text' % pattern)
+    return index_registry.put(view.id(), 'custom', pattern, view.change_count(),
+        ([begin for begin, end in matches], [end for begin, end in matches]))
+
+# SECTION: LINE SNAPSHOTS
+def word_separators(view):
+    return view.settings().get('word_separators', DEFAULT_WORD_SEPARATORS)
+
+def line_snapshot(view):
+    separators = word_separators(view)
+    snapshot = index_registry.get(view.id(), 'lines', separators, view.change_count())
+    if snapshot is None:
+        # NOTE: the boundaries of lines that were not edited are carried over from the previous snapshot
+        return index_registry.put(view.id(), 'lines', separators, view.change_count(),
+            LineSnapshot(view.substr(sublime.Region(0, view.size())), separators,
+                index_registry.latest(view.id(), 'lines', separators)))
+    # NOTE: snapshots cache the boundaries of lines as they are queried, so they grow after they are put
+    index_registry.remeasure(view.id(), 'lines', separators)
+    return snapshot
+
+def has_line_snapshot(view):
+    return word_separators(view) in index_registry.values(view.id(), 'lines', view.change_count())
+
+# SECTION: BOOKMARKS, MODIFICATIONS AND MISSPELLINGS
+'''
+Bookmarks, modifications and misspellings are demarcated by lists of regions that the editor keeps track of,
+which we index as sorted arrays of region beginnings and endings, once per version of the view. 
+Bookmarks can be toggled without changing the view, so they are read afresh on every call, which is cheap.
+Modifications are found by diffing the view against the file on disk (once per version of both), trimming the unchanged head and tail first,
+so that the cost of each version is proportional to the size of the edits rather than the size of the file.
+The editor provides no way to read the regions of misspelled words, so they are found by 
+stepping through them with "next_misspelling", then restoring the selection and viewport.
+Each step runs a command, so only misspellings within MISSPELLING_WINDOW characters of the selection are found,
+and they are found again whenever the selection comes within half that distance of a part of the view that was not searched.
+'''
+MAX_MISSPELLINGS = 10000
+MISSPELLING_WINDOW = 20000 # characters searched for misspellings on either side of the selection
+
+def region_index(regions):
+    regions = sorted((region.begin(), region.end()) for region in regions)
+    return [begin for begin, end in regions], sorted(end for begin, end in regions)
+
+def bookmark_index(view):
+    return region_index(view.get_regions('bookmarks'))
+
+def misspelling_demarcation(view, selections):
+    beginnings, endings, window = misspelling_index(view, selections)
+    demarcation_ = RegionListDemarcation(beginnings, endings)
+    if window is not None and window.size() < view.size():
+        demarcation_.window = window # NOTE: lets callers search near the end of the view when moving to it
+    return demarcation_
+
+def misspelling_index(view, selections):
+    """Returns the beginnings and endings of misspelled words near the given selections, along with the window that was searched"""
+    if not view.settings().get('spell_check'):
+        return [], [], None
+    dictionary = view.settings().get('dictionary')
+    index = index_registry.get(view.id(), 'misspellings', dictionary, view.change_count())
+    if index is None or not is_searched(view, index[2], selections):
+        begin = min([selection.begin() for selection in selections] or [0])
+        end = max([selection.end() for selection in selections] or [0])
+        window = sublime.Region(max(begin - MISSPELLING_WINDOW, 0), min(end + MISSPELLING_WINDOW, view.size()))
+        index = index_registry.put(view.id(), 'misspellings', dictionary, view.change_count(), 
+            region_index(misspelled_regions(view, window)) + (window,))
+    return index
+
+def is_searched(view, window, selections):
+    """Returns whether a window extends at least half of MISSPELLING_WINDOW beyond the selections, or up to the edges of the view"""
+    margin = MISSPELLING_WINDOW // 2
+    return all((window.begin() <= 0 or window.begin() <= selection.begin() - margin) 
+        and (window.end() >= view.size() or selection.end() + margin <= window.end())
+        for selection in selections)
+
+def misspelled_regions(view, window):
+    selections = list(view.sel())
+    viewport = view.viewport_position()
+    view.sel().clear()
+    view.sel().add(sublime.Region(window.begin(), window.begin()))
+    regions = []
+    while len(regions) < MAX_MISSPELLINGS:
+        view.run_command('next_misspelling')
+        region = view.sel()[0]
+        if (region.empty() or region.begin() < window.begin() or region.begin() >= window.end()
+                or (regions and region.begin() <= regions[-1].begin())): 
+            break # NOTE: "next_misspelling" wraps around once it reaches the last misspelling
+        regions.append(region)
+    view.sel().clear()
+    view.sel().add_all(selections)
+    view.set_viewport_position(viewport, False)
+    return regions
+
+def modification_index(view):
+    version = reference_version(view)
+    index = index_registry.get(view.id(), 'modifications', '', view.change_count())
+    if index is None or index[0] != version:
+        index = index_registry.put(view.id(), 'modifications', '', view.change_count(), 
+            (version,) + region_index(modified_regions(view)))
+    return index[1:]
+
+def reference_version(view):
+    """Returns the path, modification time and encoding of the file on disk for a view, 
+    which change whenever the file is saved or reopened with another encoding, or None if there is no such file.
+    NOTE: cached values are validated against the version rather than keyed by it, so that each view holds one copy."""
+    path = view.file_name()
+    if not path or not os.path.isfile(path):
+        return None
+    return (path, os.path.getmtime(path), view.encoding())
+
+def python_encoding(encoding):
+    """Returns the name of the python codec for an encoding as named by view.encoding(), e.g. "Western (Windows 1252)", 
+    or utf-8 if there is none (e.g. "Hexadecimal" or "Undefined")"""
+    name = re.sub(r' with BOM$', '', encoding or '')
+    match = re.search(r'\((.*)\)', name)
+    name = (match.group(1) if match else name).lower()
+    for candidate in [name.replace(' ', '-'), name.replace(' ', '')]:
+        try:
+            codec = codecs.lookup(candidate).name
+        except LookupError:
+            continue
+        if codec != 'undefined': # NOTE: python's "undefined" codec raises on every call
+            return codec
+    return 'utf-8'
+
+def reference_lines(view):
+    """Returns the lines of the file on disk for a view, decoded as the view was, or None if there is no such file"""
+    version = reference_version(view)
+    if version is None:
+        return None
+    reference = index_registry.get(view.id(), 'reference', '', 0)
+    if reference is None or reference[0] != version:
+        with open(view.file_name(), 'rb') as file:
+            text = file.read().decode(python_encoding(view.encoding()), 'replace')
+        if text.startswith(u'\ufeff'):
+            text = text[1:]
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        reference = index_registry.put(view.id(), 'reference', '', 0, (version, text.split('\n')))
+    return reference[1]
+
+def modified_regions(view):
+    reference = reference_lines(view)
+    if reference is None:
+        return []
+    text = view.substr(sublime.Region(0, view.size()))
+    lines = text.split('\n')
+    starts = line_starts(text)
+    head = 0
+    while head < min(len(lines), len(reference)) and lines[head] == reference[head]:
+        head += 1
+    tail = 0
+    while (tail < min(len(lines), len(reference)) - head 
+            and lines[len(lines)-1-tail] == reference[len(reference)-1-tail]):
+        tail += 1
+    matcher = difflib.SequenceMatcher(None, reference[head:len(reference)-tail], lines[head:len(lines)-tail], autojunk=False)
+    regions = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal': 
+            continue
+        first, last = head + j1, head + j2 - 1
+        if tag == 'delete':
+            position = starts[first] if first < len(starts) else len(text)
+            regions.append(sublime.Region(position, position))
+        else:
+            regions.append(sublime.Region(starts[first], starts[last] + len(lines[last])))
+    return regions
+
+# SECTION: BUILDING SCOPE TREES
+SCOPE_TREE_TYPES = ['functions', 'classes']
+
+def scope_tree(view, type, demarcation_):
+    """Returns the tree of nested scopes of a type, 
+    built from the demarcation of that type once per version of the buffer.
+    Within large files, the tree only covers the window that the demarcation searched, 
+    so it is rebuilt whenever the window moves."""
+    language = source(view)
+    key = index_key(type, language)
+    change_count = view.change_count()
+    window = getattr(demarcation_, 'window', None)
+    tree = index_registry.get(view.id(), 'tree', key, change_count)
+    if tree is None or tree.window != window:
+        tree = ScopeTree(scope_intervals(view, language, demarcation_, window), window)
+        index_registry.put(view.id(), 'tree', key, change_count, tree)
+    return tree
+
+def scope_intervals(view, language, demarcation_, window=None):
+    beginnings = sorted(demarcation_.declaration_beginnings)
+    if language == 'python':
+        region = window or sublime.Region(0, view.size())
+        return list(zip(beginnings, 
+            indented_block_ends(view.substr(region), region.begin(), beginnings, view.settings().get('tab_size', 4))))
+    openings, closings = braces(view, window)
+    if not openings:
+        return predeclared_intervals([(beginning, demarcation_.nextend(beginning)) for beginning in beginnings], 
+            demarcation_.prevbegin, openings)
+    matches = matching_braces(openings, closings)
+    return predeclared_intervals([(beginning, matches.get(first(opening for opening in openings[bisect_left(openings, beginning):]), 
+                demarcation_.nextend(beginning)))
+        for beginning in beginnings], demarcation_.prevbegin, openings)
+
+def braces(view, window=None):
+    """Returns the sorted positions of opening braces and the sorted ends of closing braces"""
+    if window:
+        # NOTE: the syntax is not queried within large files, so braces are found by regular expressions
+        text = view.substr(window)
+        return ([match.start() + window.begin() for match in compiled_demarcator(r'\{').finditer(text)],
+                [match.end() + window.begin() for match in compiled_demarcator(r'\}').finditer(text)])
+    return (sorted(chain(
+            (brace.begin() for brace in view.find_by_selector('punctuation.section.block.begin')),
+            (brace.begin() for brace in view.find_by_selector('punctuation.section.braces.begin')))),
+        sorted(chain(
+            (brace.end() for brace in view.find_by_selector('punctuation.section.block.end')),
+            (brace.end() for brace in view.find_by_selector('punctuation.section.braces.end')))))
+
+def predeclared_intervals(intervals, prevbegin, openings):
+    """Returns intervals that start at the predeclarations of their declarations (e.g. comments or return types),
+    so that transposing scopes carries them along. A declaration keeps its own beginning if its predeclarations 
+    would overlap a preceding scope, or reach past an enclosing declaration or an opening brace."""
+    predeclared = []
+    enclosing = [] # intervals that contain the current one, innermost last
+    previous_end = 0
+    for begin, end in sorted(intervals, key=lambda interval: (interval[0], -interval[1])):
+        while enclosing and enclosing[-1][1] < end:
+            previous_end = max(previous_end, enclosing.pop()[1])
+        predeclaration = prevbegin(begin)
+        i = bisect_left(openings, begin)
+        if (predeclaration < previous_end 
+                or (enclosing and predeclaration <= enclosing[-1][0]) 
+                or (i > 0 and predeclaration <= openings[i-1])):
+            predeclaration = begin
+        predeclared.append((min(predeclaration, begin), end))
+        enclosing.append((begin, end))
+    return predeclared
+
+def matching_braces(openings, closings):
+    """Returns a dict mapping the position of each opening brace to the end of its closing brace"""
+    matches = {}
+    stack = []
+    for position, is_opening in sorted(chain(((opening, True) for opening in openings), 
+                                             ((closing, False) for closing in closings))):
+        if is_opening:
+            stack.append(position)
+        elif stack:
+            matches[stack.pop()] = position
+    return matches
+
+def indent_length(line_text, tab_size):
+    indentation = re.match(r'[ \t]*', line_text).group()
+    return indentation.count('\t')*tab_size + indentation.count(' ')
+
+def indented_block_ends(text, offset, beginnings, tab_size):
+    """Returns the end of the indented block that follows each of a sorted list of declarations, 
+    in a single pass over the lines of a text that starts at a given offset.
+    A block ends at the last non-empty line before the next line that is indented no deeper than its declaration."""
+    ends = [None] * len(beginnings)
+    blocks = [] # (depth, index of declaration, end of declaration line) for each open block, innermost last
+    previous_end = offset # end of the last non-empty line
+    i = 0
+    line_begin = offset
+    for line_text in text.split('\n'):
+        line_end = line_begin + len(line_text)
+        is_empty = not line_text.strip()
+        depth = indent_length(line_text, tab_size)
+        if not is_empty:
+            while blocks and blocks[-1][0] >= depth:
+                block_depth, j, declaration_end = blocks.pop()
+                ends[j] = max(previous_end, declaration_end)
+        while i < len(beginnings) and beginnings[i] <= line_end:
+            blocks.append((depth, i, line_end))
+            i += 1
+        if not is_empty:
+            previous_end = line_end
+        line_begin = line_end + 1
+    for block_depth, j, declaration_end in blocks:
+        ends[j] = max(previous_end, declaration_end)
+    return ends
+
+# SECTION: PROJECT WIDE INDEXING
+def index_view(view):
+    """Publishes the declarations of an open view to the project index, using the same rules as movement within the view.
+    Within large files these rules only cover text near the cursor, so the whole text is parsed by regular expressions instead."""
+    path = view.file_name()
+    if not path: 
+        return
+    if LargeFilePolicy(view).degraded:
+        return project_index.submit(path, view.substr(sublime.Region(0, view.size())), source(view, 0))
+    project_index.publish(path, {
+        type: sorted(demarcation(view, type).declaration_beginnings)
+        for type in PROJECT_INDEX_TYPES
+    })
+
+def project_folders(window, settings):
+    """Returns (path, folder exclude patterns, file exclude patterns) for each folder of a window,
+    combining the patterns of the user's settings with those of each folder within the project"""
+    project = (window.project_data() if hasattr(window, 'project_data') else None) or {}
+    project_directory = os.path.dirname(window.project_file_name() or '') if hasattr(window, 'project_file_name') else ''
+    entries = dict((os.path.normcase(os.path.normpath(os.path.join(project_directory, entry.get('path', '')))), entry) 
+        for entry in project.get('folders', []))
+    folders = []
+    for folder in window.folders():
+        entry = entries.get(os.path.normcase(os.path.normpath(folder)), {})
+        folders.append((folder,
+            settings.get('folder_exclude_patterns', []) + entry.get('folder_exclude_patterns', []),
+            settings.get('file_exclude_patterns', []) + entry.get('file_exclude_patterns', [])))
+    return folders
+
+# SECTION: DEGRADED DEMARCATIONS FOR LARGE FILES
+'''
+Demarcations for functions and classes query the syntax for every declaration in the file,
+which can freeze the plugin host on huge minified or generated files. 
+When a view exceeds the thresholds of its LargeFilePolicy, we instead build demarcations 
+using plain regular expressions over a window of text surrounding the selection, 
+skip the search for predeclarations, and abort if the build exceeds a hard time budget.
+'''
+LARGE_FILE_DEFAULTS = {
+    'max_size': 4000000,        # characters in the view
+    'max_line_length': 10000,   # characters in the average line or the line of any cursor
+    'window_size': 100000,      # characters searched on either side of the selection
+    'time_budget': 250,         # milliseconds allowed to build a degraded demarcation
+}
+
+WINDOWED_DEMARCATIONS = ['functions', 'classes', 'listitems', 'conditionals', 
+    'tabulations', 'parentheses', 'brackets', 'braces', 'custom']
+
+class BudgetExceeded(Exception):
+    pass
+
+class Deadline:
+    """Raises BudgetExceeded once a given number of milliseconds have elapsed since construction,
+    or Cancelled once a given CancellationToken is"""
+    def __init__(self, milliseconds, token=None):
+        self.milliseconds = milliseconds
+        self.expiry = time.time() + milliseconds / 1000.0
+        self.token = token
+    def check(self):
+        if self.token: self.token.check()
+        if time.time() > self.expiry:
+            raise BudgetExceeded('ContextualMove: gave up after exceeding the time budget of %dms' % self.milliseconds)
+
+class LargeFilePolicy:
+    """Decides whether demarcations for a view must be built using a cheaper strategy.
+    Thresholds are read from the "contextual_move_large_file" setting of the view, 
+    so they can be tuned per syntax within syntax specific settings files."""
+    def __init__(self, view):
+        settings = dict(LARGE_FILE_DEFAULTS)
+        settings.update(view.settings().get('contextual_move_large_file') or {})
+        self.window_size = settings['window_size']
+        self.time_budget = settings['time_budget']
+        self.view = view
+        size = view.size()
+        line_count = view.rowcol(size)[0] + 1
+        self.degraded = (size > settings['max_size'] 
+            or size / line_count > settings['max_line_length']
+            or any(view.line(selection.b).size() > settings['max_line_length'] for selection in view.sel()))
+    def window(self, selections):
+        begin = min([selection.begin() for selection in selections] or [0])
+        end = max([selection.end() for selection in selections] or [0])
+        return sublime.Region(max(begin - self.window_size, 0), min(end + self.window_size, self.view.size()))
+
+def find_all_in(text, pattern, offset, deadline):
+    regions = []
+    for match in compiled_demarcator(pattern).finditer(text):
+        if match.end() == match.start(): continue # NOTE: see "custom_index"
+        regions.append(sublime.Region(match.start() + offset, match.end() + offset))
+        if len(regions) % 256 == 0: deadline.check()
+    deadline.check()
+    return regions
+
+def windowed_demarcation(view, type, language, demarcator, window, deadline):
+    """Returns a demarcation of the text within a window, 
+    which remembers its window so that callers can tell it may be missing boundaries beyond it"""
+    demarcation_ = demarcation_within(view, type, language, demarcator, window, deadline)
+    demarcation_.window = window
+    return demarcation_
+
+def demarcation_within(view, type, language, demarcator, window, deadline):
+    text = view.substr(window)
+    found = {}
+    def find(pattern):
+        if pattern not in found:
+            found[pattern] = find_all_in(text, pattern, window.begin(), deadline)
+        return found[pattern]
+    if type in REGEX_DECLARATIONS:
+        if language == 'python':
+            return PythonScopeDemarcation(view, find(declaration_pattern(type, language)), window.end(), window.begin())
+        return CLikeScopeDemarcation(
+                window.end(),
+                find(declaration_pattern(type, language)),
+                find(block_end_pattern(type, language)),
+                []
+            )
+    return {
+        'tabulations': lambda: CustomDemarcation(view, r'\t', find),
+        'parentheses': lambda: CustomDemarcation(view, r'[\\(\\)]', find),
+        'brackets': lambda: CustomDemarcation(view, r'\\[|\\]', find),
+        'braces': lambda: CustomDemarcation(view, r'[{}]', find),
+        'custom': lambda: CustomDemarcation(view, demarcator, find),
+        'listitems': lambda: ListItemDemarcation(view, find),
+        'conditionals': lambda: ListItemDemarcation(view, find),
+    }[type]()
+
+# SECTION: SCOPE TREES
+SCOPE_SIZE = 256 # approximate bytes held by each scope, including its entry in lists of beginnings and children
+
+class Scope:
+    def __init__(self, begin, end, parent):
+        self.begin = begin
+        self.end = end
+        self.parent = parent
+        self.children = []
+        self.depth = parent.depth + 1 if parent else 0
+
+class ScopeTree:
+    """A tree of nested scopes (e.g. methods within classes, or closures within functions),
+    built from (begin, end) intervals that either nest or do not overlap.
+    The innermost scope containing a position is found by bisecting the sorted beginnings of scopes,
+    then walking up through parents, so queries cost O(log n) plus the depth of nesting."""
+    def __init__(self, intervals, window=None):
+        self.window = window # NOTE: the region of text that intervals were found within, if not the whole view
+        self.scopes = []
+        self.roots = []
+        stack = []
+        for begin, end in sorted(intervals, key=lambda interval: (interval[0], -interval[1])):
+            while stack and stack[-1].end < end:
+                stack.pop()
+            parent = stack[-1] if stack else None
+            scope = Scope(begin, end, parent)
+            (parent.children if parent else self.roots).append(scope)
+            self.scopes.append(scope)
+            stack.append(scope)
+        self.beginnings = [scope.begin for scope in self.scopes]
+    def approximate_size(self):
+        return len(self.scopes) * SCOPE_SIZE
+    def containing(self, position):
+        """Returns the innermost scope containing a position, or None"""
+        i = bisect_right(self.beginnings, position) - 1
+        scope = self.scopes[i] if i >= 0 else None
+        while scope and scope.end < position:
+            scope = scope.parent
+        return scope
+    def siblings(self, scope):
+        return scope.parent.children if scope.parent else self.roots
+
+class ScopeTreeDemarcation:
+    """a category of functions mapping positions to the boundaries of the innermost scope within a scope tree"""
+    def __init__(self, tree):
+        self.tree = tree
+    def prevbegin(self, position):
+        scope = self.tree.containing(position)
+        return scope.begin if scope else position
+    def nextend(self, position):
+        scope = self.tree.containing(position)
+        return scope.end if scope else position
+
+class SiblingTraversal:
+    """A category of functions iterating through regions that share the same parent within a scope tree,
+    so that regions never cross from one level of nesting to another."""
+    def __init__(self, tree):
+        self.tree = tree
+        self.demarcation = ScopeTreeDemarcation(tree)
+    def prev(self, region):
+        scope = self.tree.containing(region.begin())
+        sibling = last([sibling for sibling in self.tree.siblings(scope) if sibling.end <= region.begin()]) if scope else None
+        return sublime.Region(sibling.begin, sibling.end) if sibling else region
+    def next(self, region):
+        scope = self.tree.containing(region.begin())
+        sibling = first(sibling for sibling in self.tree.siblings(scope) if region.end() <= sibling.begin) if scope else None
+        return sublime.Region(sibling.begin, sibling.end) if sibling else region
+
+# SECTION: CATEGORIES THAT DEFINE TYPES OF REGIONS
+SUB_WORD_CLASSES = (sublime.CLASS_SUB_WORD_START  
+    | sublime.CLASS_SUB_WORD_END  
+    | sublime.CLASS_WORD_START  
+    | sublime.CLASS_WORD_END  
+    | sublime.CLASS_PUNCTUATION_START  
+    | sublime.CLASS_PUNCTUATION_END  
+    | sublime.CLASS_LINE_START  
+    | sublime.CLASS_LINE_END  
+    | sublime.CLASS_EMPTY_LINE)
+
+WORD_CLASSES = (sublime.CLASS_WORD_START
+    | sublime.CLASS_WORD_END
+    | sublime.CLASS_PUNCTUATION_START 
+    | sublime.CLASS_PUNCTUATION_END 
+    # | sublime.CLASS_EMPTY_LINE
+    # | sublime.CLASS_LINE_START
+    # | sublime.CLASS_LINE_END
+    )
+
+class SubWordDemarcation:
+    """a category of functions mapping positions to region boundaries,
+    effectively providing the definition of a region"""
+    def __init__(self, view):
+        self.view = view
+    def prevbegin(self, position):
+        return self.view.find_by_class(position, False, SUB_WORD_CLASSES)
+    def nextend(self, position):
+        return self.view.find_by_class(position, True, SUB_WORD_CLASSES)
+
+class WordDemarcation:
+    """a category of functions mapping positions to region boundaries,
+    effectively providing the definition of a region"""
+    def __init__(self, view):
+        self.view = view
+    def prevbegin(self, position):
+        return self.view.find_by_class(position, False, WORD_CLASSES)
+    def nextend(self, position):
+        return self.view.find_by_class(position, True, WORD_CLASSES)
+
+class TokenizedDemarcation:
+    """a category of functions mapping positions to the boundaries of words or subwords, 
+    equivalent to SubWordDemarcation or WordDemarcation, but computed in python from a snapshot of the view's lines, 
+    so that moving many cursors requires no calls into the editor"""
+    def __init__(self, view, classes):
+        self.snapshot = line_snapshot(view)
+        self.classes = classes
+    def prevbegin(self, position):
+        return self.snapshot.find_by_class(position, False, self.classes)
+    def nextend(self, position):
+        return self.snapshot.find_by_class(position, True, self.classes)
+
+class EmptyLineDemarcation:
+    """a category of functions mapping positions to region boundaries,
+    effectively providing the definition of a region"""
+    def __init__(self, view):
+        self.view = view
+    def prevbegin(self, position):
+        return self.view.find_by_class(position, False, 
+            sublime.CLASS_EMPTY_LINE
+            # | sublime.CLASS_LINE_START
+            # | sublime.CLASS_LINE_END
+        )
+    def nextend(self, position):
+        return self.view.find_by_class(position, True, 
+            sublime.CLASS_EMPTY_LINE
+            # | sublime.CLASS_LINE_START
+            # | sublime.CLASS_LINE_END
+        )
+
+class CustomDemarcation:
+    """a category of functions mapping positions to region boundaries,
+    effectively providing the definition of a region"""
+    def __init__(self, view, demarcator, find_all=None, token=None):
+        self.view = view
+        self.demarcator = demarcator
+        if not demarcator:
+            sublime.status_message('ContextualMove: no demarcator was given, see "contextual_move_demarcators"')
+            self.delimiter_beginnings, self.delimiter_endings = [], []
+        elif find_all:
+            delimiters = find_all(demarcator)
+            self.delimiter_beginnings = [delimiter.begin() for delimiter in delimiters]
+            self.delimiter_endings = [delimiter.end() for delimiter in delimiters]
+        else:
+            self.delimiter_beginnings, self.delimiter_endings = custom_index(view, demarcator, token)
+    def prevbegin(self, position):
+        # NOTE: delimiters may be matched by more complex means (e.g. list items with parens and bracks, 
+        # using braces_match() on the text inbetween), but results do not feel very predictable to the user
+        i = bisect_right(self.delimiter_endings, position)
+        return self.delimiter_endings[i-1] if i > 0 else position
+    def nextend(self, position):
+        i = bisect_left(self.delimiter_beginnings, position)
+        return self.delimiter_beginnings[i] if i < len(self.delimiter_beginnings) else position
+
+class ListItemDemarcation:
+    """a category of functions mapping positions to region boundaries,
+    effectively providing the definition of a region"""
+    def __init__(self, view, find_all=None):
+        self.view = view
+        self.find_all = find_all or view.find_all
+    def prevbegin(self, position):
+        return max([delimiter.end()
+            for delimiter in self.find_all(r'[,([{]\s*')
+            if delimiter.end() <= position
+            # NOTE: the line below can be used to match complex list items with parens and bracks, 
+            # but results do not feel very predictable to the user
+            # and braces_match(self.view.substr(sublime.Region(position, delimiter.begin())))
+        ] or [position])
+    def nextend(self, position):
+        return min([delimiter.begin()
+            for delimiter in self.find_all(r'[,)}]')
+            if position <= delimiter.begin()
+            # NOTE: the line below can be used to match complex list items with parens and bracks, 
+            # but results do not feel very predictable to the user
+            # and braces_match(self.view.substr(sublime.Region(position, delimiter.begin())))
+        ] or [position])
+
+class RegionListDemarcation:
+    """a category of functions mapping positions to the boundaries of a sorted list of regions,
+    such as bookmarks, modifications or misspellings"""
+    def __init__(self, beginnings, endings):
+        self.beginnings = beginnings
+        self.endings = endings
+    def prevbegin(self, position):
+        i = bisect_right(self.beginnings, position)
+        return self.beginnings[i-1] if i > 0 else position
+    def nextend(self, position):
+        i = bisect_left(self.endings, position)
+        return self.endings[i] if i < len(self.endings) else position
+
+class CLikeScopeDemarcation:
+    """a category of functions mapping positions to boundaries for functions within c-like langauges,
+    effectively providing the definition for functions within these languages.
+    Starting boundaries include "predeclarations" such as comments and template constructs, 
+    which may be customized by the user."""
+    def __init__(self, view_size, declarations, braces, predeclarations):
+
+        self.declaration_beginnings = list(declaration.begin() for declaration in declarations)
+        self.brace_endings = list(brace.end() for brace in braces)
+        self.predeclaration_beginnings = list(predeclaration.begin() for predeclaration in predeclarations)
+        self.view_size = view_size
+    @classmethod
+    def from_index(cls, view_size, index):
+        demarcation = cls(view_size, [], [], [])
+        demarcation.declaration_beginnings = index['declarations']
+        demarcation.brace_endings = index['braces']
+        demarcation.predeclaration_beginnings = index['predeclarations']
+        return demarcation
+    def index(self):
+        return {
+            'declarations': sorted(self.declaration_beginnings),
+            'braces': sorted(self.brace_endings),
+            'predeclarations': sorted(self.predeclaration_beginnings),
+        }
+    def nextend(self, position):
+        braces = [ending 
+            for ending in self.brace_endings
+            if position <= ending]
+        nearest_valid_beginning = min([beginning 
+            for beginning in self.declaration_beginnings
+            if position < beginning
+            and [brace for brace in braces if brace < beginning]] 
+            or [self.view_size-1])
+        return max([brace 
+            for brace in braces 
+            if brace < nearest_valid_beginning] or [position])
+    def prevbegin(self, position):
+        declaration = max([declaration 
+            for declaration in self.declaration_beginnings
+            if declaration <= position] 
+            or [min(self.declaration_beginnings or [position])])
+        previous_brace = max([ending
+            for ending in self.brace_endings
+            if ending < declaration] or [-1]) # NOTE: so that a comment at the start of the view precedes the first declaration
+        predeclaration = min([predeclaration 
+            for predeclaration in self.predeclaration_beginnings
+            if previous_brace < predeclaration and predeclaration <= position] or [declaration]) 
+        return min([predeclaration, declaration])
+
+class PythonScopeDemarcation:
+    """a category of functions mapping positions to boundaries for functions or classes within python,
+    where a scope ends at the last line before a later declaration that is indented deeper than that declaration.
+    The lines of the view are read once, on first use, so that nextend() makes no calls into the editor."""
+    def __init__(self, view, declarations, view_end=None, view_begin=0):
+        self.view = view
+        self.declaration_beginnings = list(declaration.begin() for declaration in declarations)
+        self.view_end = view.size() if view_end is None else view_end
+        self.view_begin = view_begin
+        self.blocks = None
+    @classmethod
+    def from_index(cls, view, index):
+        demarcation = cls(view, [])
+        demarcation.declaration_beginnings = index['declarations']
+        return demarcation
+    def index(self):
+        return {'declarations': sorted(self.declaration_beginnings)}
+    def prevbegin(self, position):
+        view = self.view
+        return max([declaration 
+            for declaration in self.declaration_beginnings
+            if declaration <= position]
+            or [min(self.declaration_beginnings or [position])])
+    def nextend(self, position):
+        starts, declarations, block_ends = self.block_index()
+        line_start = starts[max(bisect_right(starts, position) - 1, 0)]
+        endings = []
+        for i in range(bisect_right(declarations, position), len(declarations)):
+            # NOTE: lines before the line of the position are not considered, 
+            #       in which case the scope extends to the end of the view
+            block_end = block_ends[i] if block_ends[i] is not None and line_start <= block_ends[i] else self.view_end - 1
+            if position < block_end:
+                endings.append(block_end)
+        return min(endings or [position])
+    def block_index(self):
+        """Returns the beginnings of lines, the sorted declarations (followed by the end of the view),
+        and the end of the last line before each declaration that is indented deeper than it, or None"""
+        if self.blocks is None:
+            tab_size = self.view.settings().get('tab_size', 4)
+            declarations = sorted(list(self.declaration_beginnings) + [self.view_end - 1])
+            block_ends = [None] * len(declarations)
+            starts = []
+            last_ends = {} # indentation -> end of the last line with that indentation
+            i = 0
+            # NOTE: lines are read whole, since a window may begin or end within the indentation of a line
+            region = self.view.line(sublime.Region(self.view_begin, max(self.view_end - 1, self.view_begin)))
+            line_begin = region.begin()
+            for line_text in self.view.substr(region).split('\n'):
+                line_end = line_begin + len(line_text)
+                indentation = re.match(r'\s*', line_text).group()
+                depth = indentation.count('\t')*tab_size + indentation.count(' ')
+                while i < len(declarations) and declarations[i] <= line_end:
+                    block_ends[i] = max([end for deeper, end in last_ends.items() if depth < deeper] or [None])
+                    i += 1
+                last_ends[depth] = line_end
+                starts.append(line_begin)
+                line_begin = line_end + 1
+            self.blocks = (starts, declarations, block_ends)
+        return self.blocks
+
+# SECTION: FUNCTIONS THAT HELP WORK WITH PREDEFINED REGION TYPES (FUNCTIONS, CLASSES, ETC.)
+def cursor_pos(view):
+    return view.sel()[0].b
+
+### Scope
+def scope_name(view, pos=None):
+    if pos is None:
+        pos = cursor_pos(view)
+    return view.scope_name(pos)
+
+def parsed_scope(view, pos=None):
+    return parse_scope(scope_name(view, pos))
+
+def source(view, pos=None):
+    return first(vec[1] for vec in parsed_scope(view, pos) if vec[0] == 'source')
+
+def parse_scope(scope_name):
+    return [name.split('.') for name in scope_name.split()]
+
+def is_escaped(view, pos):
+    return any(s[0] in ('comment', 'string') for s in parsed_scope(view, pos))
+
+def braces_match(text):
+    return text.count('(') == text.count(')') and text.count('[') == text.count(']') and text.count('{') == text.count('}')
\ No newline at end of file
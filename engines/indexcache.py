@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+
+"""
+A persistent cache of boundary indexes, stored on disk under the cache directory of the package.
+
+A boundary index maps each demarcation type (e.g. "functions" or "classes")
+to a set of named, sorted arrays of character offsets (e.g. "declarations" or "braces").
+Each file in the cache holds all indexes for a single path,
+and is keyed by the path, size, modification time and content hash of the file on disk,
+where the content is only hashed once the rest of the key matches.
+Files are laid out as a small json header followed by 64 bit offset arrays,
+so arrays can be memory mapped on load instead of being parsed.
+The total size of the cache is capped, evicting the least recently used files first.
+"""
+
+import os
+import io
+import json
+import mmap
+import struct
+import hashlib
+import sublime
+
+MAGIC = b'CMIX'
+VERSION = 1
+HEADER = struct.Struct('<4sII') # magic, version, length of json metadata
+OFFSET_SIZE = 8
+DEFAULT_CAPACITY = 32 # megabytes
+
+def cache_directory():
+    return os.path.join(sublime.cache_path(), 'ContextualMove', 'indexes')
+
+def cache_file(path):
+    return os.path.join(cache_directory(), hashlib.sha1(path.encode('utf-8')).hexdigest() + '.idx')
+
+hashes = {} # path -> (size, modification time, content hash), so that each version of a file is hashed once
+
+def content_hash(key):
+    known = hashes.get(key['path'])
+    if known and known[:2] == (key['size'], key['mtime']):
+        return known[2]
+    digest = hashlib.sha1()
+    with open(key['path'], 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    hashes[key['path']] = (key['size'], key['mtime'], digest.hexdigest())
+    return digest.hexdigest()
+
+def signature(view):
+    """Returns the key that must match for the indexes of a view to be reused, except for the hash of its content,
+    or None if the view does not reflect a file on disk. 
+    Hashing reads the whole file, so it is only done once the rest of the key matches (see "hashed")."""
+    path = view.file_name()
+    if not path or view.is_dirty():
+        return None
+    return file_signature(path, view.settings().get('syntax'))
+
+def file_signature(path, syntax):
+    if not os.path.isfile(path):
+        return None
+    stat = os.stat(path)
+    return {
+        'path': path,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'syntax': syntax,
+    }
+
+def hashed(key):
+    return dict(key, hash=content_hash(key))
+
+def load(view):
+    """Returns a dict mapping demarcation types to boundary indexes for a view,
+    or an empty dict if the cache has no valid entry for the view.
+    Offset arrays are memory mapped views over the cache file."""
+    return read(signature(view))
+
+def read(key):
+    """Returns the indexes cached under a key (see "signature"), or an empty dict"""
+    if key is None: return {}
+    filename = cache_file(key['path'])
+    try:
+        with open(filename, 'rb') as file:
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (IOError, OSError, ValueError):
+        return {}
+    try:
+        magic, version, length = HEADER.unpack_from(mapping, 0)
+    except struct.error:
+        return {}
+    if magic != MAGIC or version != VERSION:
+        return {}
+    try:
+        metadata = json.loads(mapping[HEADER.size:HEADER.size+length].decode('utf-8'))
+        if dict(metadata['key'], hash=None) != dict(key, hash=None) or metadata['key']['hash'] != content_hash(key):
+            return {}
+        offsets = memoryview(mapping)[HEADER.size+length:]
+        indexes = {
+            type: {
+                name: offsets[start:start + count*OFFSET_SIZE].cast('q')
+                for name, (start, count) in arrays.items()
+            }
+            for type, arrays in metadata['indexes'].items()
+        }
+    except (ValueError, TypeError, KeyError): # NOTE: the file is corrupt or truncated
+        return {}
+    except (IOError, OSError): # NOTE: the file on disk was removed while it was hashed
+        return {}
+    try:
+        os.utime(filename, None) # NOTE: modification time tracks recency of use, for eviction
+    except (IOError, OSError):
+        pass
+    return indexes
+
+def save(view, indexes):
+    """Writes boundary indexes for a view to the cache,
+    where indexes is a dict mapping demarcation types to dicts of sorted offset arrays.
+    Indexes must have been built from the current contents of the view."""
+    write(signature(view), indexes, view.settings().get('contextual_move_disk_cache_size', DEFAULT_CAPACITY) * 1024 * 1024)
+
+def write(key, indexes, capacity):
+    """Writes indexes to the cache under a key (see "signature"), then evicts files until the cache is within capacity, in bytes"""
+    if key is None: return
+    try:
+        key = hashed(key)
+    except (IOError, OSError):
+        return
+    layout = {}
+    body = io.BytesIO()
+    for type, arrays in indexes.items():
+        layout[type] = {}
+        for name, offsets in arrays.items():
+            layout[type][name] = [body.tell(), len(offsets)]
+            body.write(struct.pack('=%dq' % len(offsets), *offsets))
+    metadata = json.dumps({'key': key, 'indexes': layout}).encode('utf-8')
+    metadata += b' ' * (-(HEADER.size + len(metadata)) % OFFSET_SIZE) # NOTE: aligns offset arrays
+    directory = cache_directory()
+    filename = cache_file(key['path'])
+    temporary = filename + '.tmp'
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(temporary, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(metadata)))
+            file.write(metadata)
+            file.write(body.getvalue())
+        os.replace(temporary, filename)
+    except (IOError, OSError):
+        return # NOTE: the file may still be mapped by a previous load on some platforms
+    evict(capacity)
+
+def evict(capacity):
+    """Deletes the least recently used files in the cache until its total size is within capacity, in bytes"""
+    directory = cache_directory()
+    entries = []
+    try:
+        names = os.listdir(directory)
+    except (IOError, OSError):
+        return
+    for name in names:
+        filename = os.path.join(directory, name)
+        try:
+            stat = os.stat(filename)
+        except (IOError, OSError): # NOTE: temporary files may be replaced while we list them
+            continue
+        entries.append((stat.st_mtime, stat.st_size, filename))
+    total = sum(size for mtime, size, filename in entries)
+    for mtime, size, filename in sorted(entries):
+        if total <= capacity: break
+        try:
+            os.remove(filename)
+        except (IOError, OSError): # NOTE: on some platforms, files cannot be removed while they are mapped
+            continue
+        total -= size
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+
+"""
+Rules for finding declarations in source code using only regular expressions,
+for when querying the syntax of a view is too expensive (see "LargeFilePolicy")
+or impossible because the file is not open (see "ProjectIndex").
+Languages are named after the second component of their base scope, e.g. "source.python" is "python".
+"""
+
+REGEX_DECLARATIONS = {
+    'functions': {
+        'python': r'^[ \t]*(?:async[ \t]+)?def\b',
+        'js': r'([\t ]*(?:\w+ *:|(?:(?:var|let|const) +)?[\w.]+ *=) *)?\bfunction\b',
+        'r': r'([\t ]*(?:\w+ *:|(?: +)?[\w.]+ *=) *)?\bfunction\b',
+        'fortran': r'\bsubroutine\b',
+        'clike': r'^[ \t]*(?!(?:if|for|while|switch|catch|else|do|return)\b)[\w~][\w:<>,*& \t~]*\([^;{}]*\)[^;{}]*\{',
+    },
+    'classes': {
+        'python': r'^[ \t]*class\b',
+        'fortran': r'\bmodule\b',
+        'clike': r'^[ \t]*(?:[\w]+[ \t]+)*(?:class|struct|enum)\b[^;{]*\{',
+    },
+}
+
+REGEX_BLOCK_ENDS = {
+    'functions': {
+        'fortran': r'\bend subroutine\b',
+        'clike': r'\}',
+    },
+    'classes': {
+        'fortran': r'\bend module\b',
+        'clike': r'\}',
+    },
+}
+
+def declaration_pattern(type, language):
+    patterns = REGEX_DECLARATIONS[type]
+    return patterns.get(language, patterns['clike'])
+
+def block_end_pattern(type, language):
+    patterns = REGEX_BLOCK_ENDS[type]
+    return patterns.get(language, patterns['clike'])
+
+EXTENSIONS = {
+    'py': 'python', 'pyw': 'python',
+    'js': 'js', 'mjs': 'js', 'cjs': 'js', 'jsx': 'js', 'ts': 'js', 'tsx': 'js',
+    'r': 'r', 
+    'c': 'c', 'h': 'c',
+    'cc': 'c++', 'cpp': 'c++', 'cxx': 'c++', 'hh': 'c++', 'hpp': 'c++', 'hxx': 'c++',
+    'java': 'java',
+    'cs': 'cs',
+    'f': 'fortran', 'for': 'fortran', 'f90': 'fortran', 'f95': 'fortran', 'f03': 'fortran',
+}
+
+def extension_language(path):
+    """Returns the name of the language of a file given its path, or None if the language is unknown"""
+    return EXTENSIONS.get(path.rsplit('.', 1)[-1].lower()) if '.' in path else None
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+A shared index of function and class declarations across files,
+allowing movement by functions or classes to continue into neighbouring files.
+
+Files are parsed as plain text on a pool of worker threads, using the rules in "languages".
+Workers never modify the index in place: results are published
+by replacing the current snapshot with a new one, so the UI thread only ever reads finished snapshots.
+Publishing copies the index, so a walk through folders gathers the results of its batches 
+and publishes them once they amount to a fraction of the index, rather than after every batch.
+"""
+
+import os
+import re
+import fnmatch
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .languages import *
+except ValueError: # HACK: for ST2 compatability
+    from languages import *
+
+TYPES = ['functions', 'classes']
+BATCH_SIZE = 64
+PUBLISHED_FRACTION = 0.5 # of the files in the index, that a walk gathers before publishing its results
+MAX_FILE_SIZE = 4000000 # characters, files that are larger are not worth parsing
+
+class Snapshot:
+    """An immutable mapping from file paths to sorted declaration beginnings for each type"""
+    def __init__(self, files):
+        self.files = files
+        self.paths = sorted(files)
+    def declarations(self, path, type):
+        return self.files[path][type] if path in self.files else []
+    def neighbour(self, path, type, forward):
+        """Returns the nearest path before or after a given path that has at least one declaration of a type"""
+        paths = self.paths if forward else list(reversed(self.paths))
+        is_after = (lambda other: other > path) if forward else (lambda other: other < path)
+        after = [other for other in paths if is_after(other)]
+        before = [other for other in paths if not is_after(other) and other != path]
+        return first_path_with(self, after + before, type)
+
+def first_path_with(snapshot, paths, type):
+    for path in paths:
+        if snapshot.files[path][type]:
+            return path
+    return None
+
+def normalize(text):
+    # NOTE: sublime always represents line endings as a single "\n" within buffers
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+def parse(text, language):
+    return {
+        type: [match.start() for match in re.finditer(declaration_pattern(type, language), text, re.MULTILINE)]
+        for type in TYPES
+    }
+
+def parse_file(path, text=None, language=None):
+    """Returns declarations for a file, parsing either the given text or the contents of the file on disk"""
+    language = language or extension_language(path)
+    if text is None:
+        if os.path.getsize(path) > MAX_FILE_SIZE: return None
+        with open(path, 'r', encoding='utf-8', errors='replace') as file:
+            text = file.read()
+    return parse(normalize(text), language)
+
+class ProjectIndex:
+    def __init__(self, workers=4):
+        self.snapshot = Snapshot({})
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+    def submit(self, path, text=None, language=None):
+        """Schedules a single file to be parsed, e.g. when it is loaded or saved.
+        The text of open views should be passed in since workers must not access views."""
+        self.executor.submit(self.parse_batch, [(path, text, language)])
+    def submit_folders(self, folders):
+        """Schedules every source file within folders to be parsed, 
+        where folders is a list of (path, folder exclude patterns, file exclude patterns)"""
+        self.executor.submit(self.walk, folders)
+    def walk(self, folders):
+        paths = []
+        for folder, folder_excludes, file_excludes in folders:
+            for root, directories, filenames in os.walk(folder):
+                directories[:] = [directory for directory in directories 
+                    if not directory.startswith('.') and not is_excluded(directory, folder_excludes)]
+                paths.extend(os.path.join(root, filename) for filename in filenames 
+                    if extension_language(filename) and not is_excluded(filename, file_excludes))
+        walk = Walk((len(paths) + BATCH_SIZE - 1) // BATCH_SIZE)
+        for i in range(0, len(paths), BATCH_SIZE):
+            self.executor.submit(self.parse_batch, [(path, None, None) for path in paths[i:i+BATCH_SIZE]], walk)
+    def publish(self, path, declarations):
+        """Replaces the declarations of a single file, e.g. those found within an open view by its syntax"""
+        self.update({path: declarations})
+    def discard(self, path):
+        with self.lock:
+            files = dict(self.snapshot.files)
+            files.pop(path, None)
+            self.snapshot = Snapshot(files)
+    def parse_batch(self, batch, walk=None):
+        results = {}
+        for path, text, language in batch:
+            try:
+                declarations = parse_file(path, text, language)
+            except (IOError, OSError):
+                continue
+            if declarations is not None:
+                results[path] = declarations
+        if walk is not None:
+            with self.lock:
+                walk.batches -= 1
+                walk.results.update(results)
+                if walk.batches and len(walk.results) < max(BATCH_SIZE, PUBLISHED_FRACTION * len(self.snapshot.files)):
+                    return
+                results, walk.results = walk.results, {}
+        self.update(results)
+    def update(self, results):
+        with self.lock:
+            files = dict(self.snapshot.files)
+            files.update(results)
+            self.snapshot = Snapshot(files)
+    def shutdown(self):
+        """Stops the workers once pending batches are parsed, e.g. when the plugin is unloaded"""
+        self.executor.shutdown(wait=False)
+
+class Walk:
+    """The results of a walk through folders that have yet to be published, and the number of its batches left to parse"""
+    def __init__(self, batches):
+        self.batches = batches
+        self.results = {}
+
+def is_excluded(name, patterns):
+    return any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+
+project_index = ProjectIndex()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+"""
+A pure python equivalent of view.find_by_class() for words, subwords, punctuation and lines.
+
+Each call to find_by_class() crosses from python into the editor,
+which dominates the cost of moving many cursors by words or subwords.
+Instead, we classify every point of a line once, and cache the result within the snapshot of the view
+that the line belongs to, so that any number of cursors can be moved without calling into the editor.
+Snapshots are keyed by line text, so the lines that an edit leaves unchanged are not classified again.
+"""
+
+import sys
+from itertools import accumulate
+from bisect import bisect_left, bisect_right
+import sublime
+
+DEFAULT_WORD_SEPARATORS = "./\\()\"'-:,.;<>~!@#$%^&*|+=[]{}`~?"
+
+WORD, PUNCTUATION, SPACE = 'word', 'punctuation', 'space'
+
+def character_class(character, separators):
+    if character.isspace(): return SPACE
+    if character in separators: return PUNCTUATION
+    return WORD
+
+def is_subword_boundary(left, right, next):
+    """Returns whether a point between two word characters separates subwords, e.g. "sub|Word", "HTTP|Server", or "sub|_word" """
+    return ((left.islower() or left.isdigit()) and right.isupper()
+        or left.isupper() and right.isupper() and next.islower()
+        or (left == '_') != (right == '_'))
+
+def classify(line, separators):
+    """Returns a list of class flags for each point in a line, from before its first character to after its last"""
+    classes = [character_class(character, separators) for character in line]
+    padded = [SPACE] + classes + [SPACE] # NOTE: newlines on either side of a line are whitespace
+    flags = []
+    for i in range(len(line) + 1):
+        left, right = padded[i], padded[i+1]
+        flag = 0
+        if i == 0: flag |= sublime.CLASS_LINE_START
+        if i == len(line): flag |= sublime.CLASS_LINE_END
+        if not line: flag |= sublime.CLASS_EMPTY_LINE
+        if left != WORD and right == WORD: flag |= sublime.CLASS_WORD_START | sublime.CLASS_SUB_WORD_START
+        if left == WORD and right != WORD: flag |= sublime.CLASS_WORD_END | sublime.CLASS_SUB_WORD_END
+        if left != PUNCTUATION and right == PUNCTUATION: flag |= sublime.CLASS_PUNCTUATION_START
+        if left == PUNCTUATION and right != PUNCTUATION: flag |= sublime.CLASS_PUNCTUATION_END
+        if left == WORD and right == WORD and is_subword_boundary(line[i-1], line[i], line[i+1:i+2]):
+            flag |= sublime.CLASS_SUB_WORD_START | sublime.CLASS_SUB_WORD_END
+        flags.append(flag)
+    return flags
+
+def boundaries(line, separators, classes):
+    """Returns the sorted columns of points within a line that match any of the given classes"""
+    return [column for column, flag in enumerate(classify(line, separators)) if flag & classes]
+
+def line_starts(text):
+    starts = [0]
+    position = text.find('\n')
+    while position >= 0:
+        starts.append(position + 1)
+        position = text.find('\n', position + 1)
+    return starts
+
+class LineSnapshot:
+    """The text of a view, split into lines, as of a given change count,
+    along with the boundaries of every line that has been queried so far.
+    Boundaries only depend on the text of a line, so they are cached by line text rather than by row,
+    and a snapshot of an edited view can reuse the boundaries cached by the snapshot before it, 
+    so that each edit only costs splitting the text into lines again."""
+    def __init__(self, text, separators, previous=None):
+        self.lines = text.split('\n')
+        self.starts = [0]
+        self.starts.extend(accumulate(len(line) + 1 for line in self.lines[:-1]))
+        self.size = len(text)
+        self.text_size = sys.getsizeof(text) + len(self.lines) * sys.getsizeof('')
+        self.separators = separators
+        self.columns = {} # (line, classes) -> sorted columns of boundaries
+        self.column_count = 0
+        self.inherited = {}
+        self.inherited_count = 0
+        self.shared_count = 0
+        if previous is not None and previous.separators == separators:
+            self.inherited = previous.columns # NOTE: only one generation is kept, so stale lines are dropped on the next edit
+            self.inherited_count = previous.column_count
+    def line(self, row):
+        return self.lines[row]
+    def boundaries(self, row, classes):
+        key = (self.lines[row], classes)
+        columns = self.columns.get(key)
+        if columns is None:
+            columns = self.inherited.get(key)
+            if columns is None:
+                columns = boundaries(key[0], self.separators, classes)
+            else:
+                self.shared_count += len(columns) # NOTE: counted once, although held by both dicts
+            self.columns[key] = columns
+            self.column_count += len(columns)
+        return columns
+    def find_by_class(self, position, forward, classes):
+        """Behaves like view.find_by_class(), returning the nearest point strictly after (or before) a position
+        that matches any of the given classes, or the end (or beginning) of the text if there is none"""
+        position = min(max(position, 0), self.size)
+        row = bisect_right(self.starts, position) - 1
+        column = position - self.starts[row]
+        if forward:
+            for row in range(row, len(self.starts)):
+                columns = self.boundaries(row, classes)
+                i = bisect_right(columns, column)
+                if i < len(columns): return self.starts[row] + columns[i]
+                column = -1
+            return self.size
+        else:
+            for row in range(row, -1, -1):
+                columns = self.boundaries(row, classes)
+                i = bisect_left(columns, column) if column is not None else len(columns)
+                if i > 0: return self.starts[row] + columns[i-1]
+                column = None
+            return 0
+    def approximate_size(self):
+        entry_size = sys.getsizeof(()) + sys.getsizeof([])
+        return (self.text_size + sys.getsizeof(self.starts) + len(self.starts) * sys.getsizeof(2**40)
+            + (len(self.columns) + len(self.inherited)) * entry_size 
+            + (self.column_count + self.inherited_count - self.shared_count) * sys.getsizeof(2**40))
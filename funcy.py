@@ -84,10 +84,17 @@ def _make_getter(regex):
         return identity
 
 _re_type = type(re.compile(r''))
+_compiled = {} # (pattern, flags) -> compiled regex, so that helpers never compile a pattern twice
+
+def _compile(regex, flags):
+    if isinstance(regex, _re_type):
+        return regex
+    if (regex, flags) not in _compiled:
+        _compiled[(regex, flags)] = re.compile(regex, flags)
+    return _compiled[(regex, flags)]
 
 def _prepare(regex, flags):
-    if not isinstance(regex, _re_type):
-        regex = re.compile(regex, flags)
+    regex = _compile(regex, flags)
     return regex, _make_getter(regex)
 
 
@@ -106,7 +113,8 @@ def re_finder(regex, flags=0):
     return lambda s: iffy(getter)(regex.search(s))
 
 def re_tester(regex, flags=0):
-    return lambda s: bool(re.search(regex, s, flags))
+    regex = _compile(regex, flags)
+    return lambda s: bool(regex.search(s))
 
 
 ### funcy funcs
@@ -133,5 +141,8 @@ def iffy(pred, action=EMPTY, default=identity):
 def isa(*types):
     return lambda x: isinstance(x, types)
 
-from collections import Iterable
+try:
+    from collections.abc import Iterable
+except ImportError: # HACK: for ST2 compatability
+    from collections import Iterable
 iterable = isa(Iterable)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+"""
+A central registry for everything the plugin caches per view
+(e.g. boundary indexes, scope trees, and matches of custom demarcators).
+
+Each entry is stored under a kind (e.g. "index" or "tree") and a key (e.g. "functions.python"),
+alongside the change count of the view it was built from and its approximate size in bytes.
+The registry enforces a global memory budget by evicting whole views, least recently navigated first,
+and keeps counts of hits, misses and evictions so that the budget can be tuned.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+DEFAULT_BUDGET = 64 # megabytes
+INT_SIZE = sys.getsizeof(2**40)
+POINTER_SIZE = 8
+
+def approximate_size(value):
+    """Returns the approximate number of bytes held by a cached value"""
+    if hasattr(value, 'approximate_size'):
+        return value.approximate_size()
+    if isinstance(value, memoryview):
+        return 0 # NOTE: memory mapped arrays are paged in and out by the operating system
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(approximate_size(item) for item in value.values())
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(approximate_size(item) for item in value)
+    if isinstance(value, list):
+        # NOTE: cached lists are homogeneous, so we only measure the first item
+        return sys.getsizeof(value) + sum(approximate_size(item) for item in value[:1]) * len(value)
+    if isinstance(value, int):
+        return INT_SIZE
+    return sys.getsizeof(value)
+
+class Entry:
+    def __init__(self, change_count, value, size):
+        self.change_count = change_count
+        self.value = value
+        self.size = size
+
+class IndexRegistry:
+    def __init__(self, budget=DEFAULT_BUDGET*1024*1024):
+        self.budget = budget
+        self.views = OrderedDict() # view id -> {(kind, key) -> Entry}, least recently navigated first
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    def get(self, view_id, kind, key, change_count):
+        """Returns the value cached for a view at a given change count, or None"""
+        with self.lock:
+            entry = self.views.get(view_id, {}).get((kind, key))
+            if entry is None or entry.change_count != change_count:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.views.move_to_end(view_id)
+            return entry.value
+    def latest(self, view_id, kind, key):
+        """Returns the value last cached for a view, whatever its change count, or None"""
+        with self.lock:
+            entry = self.views.get(view_id, {}).get((kind, key))
+            return entry.value if entry is not None else None
+    def put(self, view_id, kind, key, change_count, value):
+        size = approximate_size(value)
+        with self.lock:
+            entries = self.views.setdefault(view_id, {})
+            entries[(kind, key)] = Entry(change_count, value, size)
+            self.views.move_to_end(view_id)
+            self.evict()
+        return value
+    def remeasure(self, view_id, kind, key):
+        """Updates the size of a cached value that grows as it is used, evicting other views if the budget is exceeded"""
+        with self.lock:
+            entry = self.views.get(view_id, {}).get((kind, key))
+            if entry is None: return
+            entry.size = approximate_size(entry.value)
+            self.evict()
+    def evict(self):
+        """Evicts the least recently navigated views until the budget is met, must be called with the lock held"""
+        total = self.total()
+        while total > self.budget and len(self.views) > 1:
+            evicted_id, evicted = self.views.popitem(last=False)
+            total -= sum(entry.size for entry in evicted.values())
+            self.evictions += 1
+    def values(self, view_id, kind, change_count):
+        """Returns a dict mapping keys to values of a kind that were cached for a view at a given change count"""
+        with self.lock:
+            return {key: entry.value
+                for (entry_kind, key), entry in self.views.get(view_id, {}).items()
+                if entry_kind == kind and entry.change_count == change_count}
+    def release(self, view_id):
+        with self.lock:
+            self.views.pop(view_id, None)
+    def total(self):
+        return sum(entry.size for entries in self.views.values() for entry in entries.values())
+    def usage(self):
+        """Returns a dict mapping view ids to dicts mapping (kind, key) to approximate bytes held"""
+        with self.lock:
+            return {view_id: {kind_key: entry.size for kind_key, entry in entries.items()}
+                for view_id, entries in self.views.items()}
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / float(lookups) if lookups else 0.0
+
+index_registry = IndexRegistry()
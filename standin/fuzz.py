@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+"""
+Runs the differential fuzz harness of "FuzzDemarcationsCommand.py" without Sublime Text, e.g.
+
+    python standin/fuzz.py --trials 100 --seed 1
+
+The stand-in views cannot classify characters, so engines that depend on "find_by_class" are skipped,
+though the tokenizer is still checked against the corpus of expected boundaries.
+Exits with a nonzero status if any candidate disagrees with its reference.
+"""
+
+import os
+import sys
+import random
+import argparse
+import importlib
+
+STANDIN = os.path.dirname(os.path.abspath(__file__))
+PACKAGE = os.path.dirname(STANDIN)
+sys.path[0:0] = [STANDIN, os.path.dirname(PACKAGE)]
+
+import sublime
+harness = importlib.import_module(os.path.basename(PACKAGE) + '.FuzzDemarcationsCommand')
+
+CLASSIFYING_ENGINES = ['subwords', 'words']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trials', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('engines', nargs='*', 
+        default=[name for name in sorted(harness.ENGINES) if name not in CLASSIFYING_ENGINES])
+    arguments = parser.parse_args()
+    corpus_lines, corpus_total = harness.corpus_report({'tokenizer': harness.tokenizer_snapshot})
+    lines, total = harness.report(sublime.View(), arguments.engines, arguments.trials, random.Random(arguments.seed))
+    print('\n'.join(corpus_lines + lines))
+    return 1 if corpus_total or total else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
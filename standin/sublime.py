@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+"""
+A stand-in for the "sublime" module, so that demarcations can be checked without Sublime Text (see "fuzz.py").
+Views hold plain text, and the syntax is emulated by the regular expressions in SELECTORS,
+which only know the constructs that "FuzzDemarcationsCommand" generates.
+"""
+
+import re
+import tempfile
+from bisect import bisect_right
+
+CLASS_WORD_START = 1
+CLASS_WORD_END = 2
+CLASS_PUNCTUATION_START = 4
+CLASS_PUNCTUATION_END = 8
+CLASS_SUB_WORD_START = 16
+CLASS_SUB_WORD_END = 32
+CLASS_LINE_START = 64
+CLASS_LINE_END = 128
+CLASS_EMPTY_LINE = 256
+
+LITERAL = 1
+IGNORECASE = 2
+
+HIDDEN = 128
+
+# SECTION: MODULE FUNCTIONS
+def version():
+    return '4000'
+
+def status_message(message):
+    pass
+
+def set_timeout(callback, delay=0):
+    callback()
+
+def set_timeout_async(callback, delay=0):
+    callback()
+
+cache_directory = None
+
+def cache_path():
+    global cache_directory
+    if cache_directory is None:
+        cache_directory = tempfile.mkdtemp(prefix='standin-cache-')
+    return cache_directory
+
+def load_settings(name):
+    return Settings()
+
+def windows():
+    return []
+
+def active_window():
+    return None
+
+# SECTION: SYNTAX EMULATION
+SCOPES = {
+    'Python': 'source.python',
+    'C++': 'source.c',
+}
+
+COMMENTS = {
+    'source.python': r'#[^\n]*',
+    'source.c': r'//[^\n]*',
+}
+
+# selector: pattern, where the first group (if any) is the region of the selector
+SELECTORS = {
+    'source.python': {
+        'meta.function': r'^[ \t]*((?:async[ \t]+)?def\b[^\n]*)|\b(lambda\b[^:\n]*:)',
+        'meta.class': r'^[ \t]*(class\b[^\n]*)',
+    },
+    'source.c': {
+        'meta.function': r'^[ \t]*(?:static[ \t]+)?(?:int|char|void)[ \t*]+(\w+\([^)\n]*\))',
+        'meta.struct': r'\b(struct[ \t]+\w+)[ \t]*\{',
+        'punctuation.section.block.begin': r'\{',
+        'punctuation.section.block.end': r'\}',
+        'punctuation.definition.comment': r'//',
+        'storage.type': r'\b(?:int|char|void|struct)\b',
+        'storage.modifier': r'\bstatic\b',
+    },
+}
+
+class Region(object):
+    def __init__(self, a, b=None):
+        self.a = a
+        self.b = a if b is None else b
+    def begin(self):
+        return min(self.a, self.b)
+    def end(self):
+        return max(self.a, self.b)
+    def size(self):
+        return self.end() - self.begin()
+    def empty(self):
+        return self.a == self.b
+    def cover(self, other):
+        return Region(min(self.begin(), other.begin()), max(self.end(), other.end()))
+    def intersects(self, other):
+        return self.begin() < other.end() and other.begin() < self.end()
+    def contains(self, other):
+        if isinstance(other, Region):
+            return self.begin() <= other.begin() and other.end() <= self.end()
+        return self.begin() <= other <= self.end()
+    def __eq__(self, other):
+        return isinstance(other, Region) and (self.a, self.b) == (other.a, other.b)
+    def __ne__(self, other):
+        return not self == other
+    def __hash__(self):
+        return hash((self.a, self.b))
+    def __repr__(self):
+        return 'Region(%d, %d)' % (self.a, self.b)
+
+class Settings(dict):
+    def set(self, key, value):
+        self[key] = value
+    def erase(self, key):
+        self.pop(key, None)
+    def add_on_change(self, key, callback):
+        pass
+    def clear_on_change(self, key):
+        pass
+
+class Selection(list):
+    def clear(self):
+        del self[:]
+    def add(self, region):
+        self.append(region if isinstance(region, Region) else Region(region))
+    def add_all(self, regions):
+        for region in regions:
+            self.add(region)
+
+class View(object):
+    count = 0
+    def __init__(self, text='', scope='text.plain'):
+        View.count += 1
+        self.view_id = View.count
+        self.text = text
+        self.scope = scope
+        self.changes = 0
+        self.selection = Selection([Region(0)])
+        self.view_settings = Settings()
+        self.regions = {}
+    def id(self):
+        return self.view_id
+    def buffer_id(self):
+        return self.view_id
+    def change_count(self):
+        return self.changes
+    def file_name(self):
+        return None
+    def is_dirty(self):
+        return self.changes > 0
+    def encoding(self):
+        return 'UTF-8'
+    def window(self):
+        return None
+    def settings(self):
+        return self.view_settings
+    def sel(self):
+        return self.selection
+    def size(self):
+        return len(self.text)
+    def substr(self, region):
+        if isinstance(region, Region):
+            return self.text[region.begin():region.end()]
+        return self.text[region:region + 1]
+    def rowcol(self, position):
+        return self.text.count('\n', 0, position), position - (self.text.rfind('\n', 0, position) + 1)
+    def line(self, position):
+        if isinstance(position, Region):
+            return self.line(position.begin()).cover(self.line(position.end()))
+        end = self.text.find('\n', position)
+        return Region(self.text.rfind('\n', 0, position) + 1, len(self.text) if end < 0 else end)
+    def full_line(self, position):
+        line = self.line(position)
+        return Region(line.begin(), min(line.end() + 1, len(self.text)))
+    def lines(self, region):
+        lines = [self.line(region.begin())]
+        while lines[-1].end() < min(region.end(), len(self.text)):
+            lines.append(self.line(lines[-1].end() + 1))
+        return lines
+    def show(self, *args, **kwargs):
+        pass
+    def viewport_position(self):
+        return (0, 0)
+    def set_viewport_position(self, *args, **kwargs):
+        pass
+    def set_status(self, key, value):
+        pass
+    def erase_status(self, key):
+        pass
+    def get_regions(self, key):
+        return self.regions.get(key, [])
+    def add_regions(self, key, regions, *args, **kwargs):
+        self.regions[key] = list(regions)
+    def erase_regions(self, key):
+        self.regions.pop(key, None)
+    def assign_syntax(self, syntax):
+        self.scope = first_scope(syntax)
+    def find_all(self, pattern, flags=0):
+        if flags & LITERAL:
+            pattern = re.escape(pattern)
+        return [Region(match.start(), match.end()) 
+            for match in re.finditer(pattern, self.text, re.M | (re.I if flags & IGNORECASE else 0))]
+    def comments(self):
+        return [(match.start(), match.end()) for match in re.finditer(COMMENTS.get(self.scope, r'(?!)'), self.text)]
+    def in_comment(self, position, comments):
+        index = bisect_right(comments, (position, float('inf'))) - 1
+        return index >= 0 and comments[index][0] <= position < comments[index][1]
+    def scope_name(self, position):
+        return self.scope + (' comment.line' if self.in_comment(position, self.comments()) else '') + ' '
+    def find_by_selector(self, selector):
+        pattern = SELECTORS.get(self.scope, {}).get(selector)
+        if pattern is None:
+            return []
+        comments = self.comments()
+        regions = []
+        for match in re.finditer(pattern, self.text, re.M):
+            group = next((index for index in range(1, len(match.groups()) + 1) if match.group(index) is not None), 0)
+            if selector == 'punctuation.definition.comment' or not self.in_comment(match.start(group), comments):
+                regions.append(Region(match.start(group), match.end(group)))
+        return regions
+    def replace(self, edit, region, text):
+        self.text = self.text[:region.begin()] + text + self.text[region.end():]
+        self.changes += 1
+    def run_command(self, command, args=None):
+        if command == 'select_all':
+            self.selection[:] = [Region(0, len(self.text))]
+        elif command == 'left_delete':
+            for region in reversed(self.selection):
+                self.replace(None, region if region.size() else Region(max(region.begin() - 1, 0), region.end()), '')
+            self.selection[:] = [Region(self.selection[0].begin())]
+        elif command == 'append':
+            self.replace(None, Region(len(self.text)), args['characters'])
+
+def first_scope(syntax):
+    return next((scope for name, scope in SCOPES.items() if '/%s/' % name in syntax), 'text.plain')
@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+"""A stand-in for the "sublime_plugin" module (see "sublime.py")"""
+
+class TextCommand(object):
+    def __init__(self, view):
+        self.view = view
+
+class WindowCommand(object):
+    def __init__(self, window):
+        self.window = window
+
+class ApplicationCommand(object):
+    pass
+
+class EventListener(object):
+    pass
+
+class ViewEventListener(object):
+    def __init__(self, view):
+        self.view = view